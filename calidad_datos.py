@@ -0,0 +1,165 @@
+import pandas as pd
+
+# ============================================================================
+# VALIDACIÓN DE CALIDAD DE DATOS (al momento de la ingesta)
+# ============================================================================
+# Cada archivo pasa por verificaciones vectorizadas de esquema, rango,
+# duplicados y referencias. El resultado es un DataFrame canónico (sin
+# marcadores 'NAN', con tipos numéricos e indicadores en escala 0–100) y una
+# lista de hallazgos para el reporte de calidad. Así las gráficas ya no
+# necesitan repetir las máscaras de limpieza en cada renderizado.
+
+# Textos que en los archivos fuente representan un valor vacío
+MARCADORES_VACIO = {'NAN', 'NA', 'N/A', 'NULL', 'NONE', ''}
+
+MUNICIPIOS_QUINDIO = ['ARMENIA', 'BUENAVISTA', 'CALARCÁ', 'CIRCASIA', 'CÓRDOBA', 'FILANDIA',
+                      'GÉNOVA', 'LA TEBAIDA', 'MONTENEGRO', 'PIJAO', 'QUIMBAYA', 'SALENTO']
+# Corregimientos que los archivos registran en la columna Municipio
+CORREGIMIENTOS_QUINDIO = ['BARCELONA', 'EL CAIMO', 'LA VIRGINIA', 'PUEBLO TAPAO', 'QUEBRADANEGRA']
+GENEROS = ['FEMENINO', 'MASCULINO', 'NO APLICA']
+
+COLUMNAS_INTERVENCIONES = ['Programa', 'Cohorte', 'Nit', 'Nombre', 'Nombre_de_la_empresa', 'Fase', 'Municipio',
+                           'Sector', 'Género', 'Tema', 'No_horas_de_consultoría', 'Indicador_satisfacción',
+                           'Indicador_ventas', 'Indicador_procesos_tecnologicos', 'Indicador_presencia_en_linea',
+                           'Año_Ejecución']
+COLUMNAS_TALLERES = ['Tema', 'Fecha', 'Horas', 'Participantes']
+
+# Indicadores que se muestran como porcentaje (0–100)
+INDICADORES_PORCENTAJE = ['Indicador_satisfacción', 'Indicador_procesos_tecnologicos', 'Indicador_presencia_en_linea']
+
+AÑO_MINIMO = 2019
+
+
+def _hallazgo(verificacion, columna, filas, accion):
+    return {'Verificación': verificacion, 'Columna': columna, 'Filas': int(filas), 'Acción': accion}
+
+
+class ErrorEsquema(ValueError):
+    # Al archivo le faltan columnas requeridas: no se puede validar ni cargar
+    def __init__(self, archivo, faltantes, filas):
+        super().__init__(f"'{archivo}' no tiene las columnas requeridas: {', '.join(faltantes)}")
+        self.faltantes = faltantes
+        self.filas = filas
+
+
+def _verificar_esquema(df, columnas, archivo):
+    # Los nombres de columna se normalizan (p. ej. 'Fecha ' -> 'Fecha')
+    df.columns = [str(c).strip() for c in df.columns]
+    faltantes = [c for c in columnas if c not in df.columns]
+    if faltantes:
+        raise ErrorEsquema(archivo, faltantes, len(df))
+
+
+def _limpiar_textos(df, hallazgos):
+    for columna in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[columna], skipna=True) not in ('string', 'mixed', 'mixed-integer'):
+            continue
+        # .str deja en NaN lo que no es texto; esos valores se conservan tal cual
+        texto = df[columna].str.strip()
+        marcador = texto.str.upper().isin(MARCADORES_VACIO)
+        if marcador.any():
+            hallazgos.append(_hallazgo('Marcador de vacío', columna, marcador.sum(), "Convertido a vacío"))
+        df[columna] = texto.where(texto.notna(), df[columna]).mask(marcador)
+
+
+def _convertir_numericas(df, columnas, hallazgos):
+    for columna in columnas:
+        convertida = pd.to_numeric(df[columna], errors='coerce')
+        invalidos = df[columna].notna() & convertida.isna()
+        if invalidos.any():
+            hallazgos.append(_hallazgo('Valor no numérico', columna, invalidos.sum(), "Convertido a vacío"))
+        df[columna] = convertida
+
+
+def _fuera_de_rango(df, columna, mascara, descripcion, hallazgos):
+    if mascara.any():
+        hallazgos.append(_hallazgo(f'Fuera de rango ({descripcion})', columna, mascara.sum(), "Convertido a vacío"))
+        df[columna] = df[columna].mask(mascara)
+
+
+def _normalizar_escala(df, columna, hallazgos):
+    # La escala se decide por programa: si todos sus valores están entre 0 y 1
+    # se interpreta como proporción y se pasa a 0–100
+    valores = df[columna]
+    if valores.notna().sum() == 0:
+        return
+    maximo = valores.groupby(df['Programa']).transform('max')
+    proporcion = valores.notna() & (maximo <= 1)
+
+    # Programas que mezclan proporciones (0 < v < 1) con valores mayores a 1
+    fraccion = (valores > 0) & (valores < 1)
+    mezcla = fraccion.groupby(df['Programa']).transform('any') & (maximo > 1) & valores.notna()
+    if mezcla.any():
+        hallazgos.append(_hallazgo('Escala mixta 0–1 / 0–100', columna, mezcla.sum(), "Solo reportado"))
+
+    if proporcion.any():
+        hallazgos.append(_hallazgo('Escala 0–1', columna, proporcion.sum(), "Normalizado a 0–100"))
+        df[columna] = valores.mask(proporcion, valores * 100)
+
+
+def _verificar_referencias(df, columna, validos, hallazgos):
+    desconocidos = df[columna].notna() & ~df[columna].isin(validos)
+    if desconocidos.any():
+        hallazgos.append(_hallazgo('Valor fuera del catálogo', columna, desconocidos.sum(), "Solo reportado"))
+
+
+# ============================================================================
+# VALIDACIÓN POR TIPO DE FUENTE
+# ============================================================================
+def validar_intervenciones(df, archivo):
+    hallazgos = []
+    _verificar_esquema(df, COLUMNAS_INTERVENCIONES, archivo)
+    _limpiar_textos(df, hallazgos)
+    _convertir_numericas(df, ['No_horas_de_consultoría', 'Indicador_ventas', 'Año_Ejecución'] + INDICADORES_PORCENTAJE, hallazgos)
+
+    sin_año = df['Año_Ejecución'].isna()
+    if sin_año.any():
+        hallazgos.append(_hallazgo('Sin año de ejecución', 'Año_Ejecución', sin_año.sum(), "Solo reportado"))
+    año_invalido = df['Año_Ejecución'].notna() & ((df['Año_Ejecución'] < AÑO_MINIMO) | (df['Año_Ejecución'] > pd.Timestamp.now().year))
+    if año_invalido.any():
+        hallazgos.append(_hallazgo(f'Fuera de rango ({AÑO_MINIMO}–año actual)', 'Año_Ejecución', año_invalido.sum(), "Solo reportado"))
+
+    _fuera_de_rango(df, 'No_horas_de_consultoría', df['No_horas_de_consultoría'] < 0, 'negativo', hallazgos)
+    # Una caída de ventas no puede superar el 100 %
+    _fuera_de_rango(df, 'Indicador_ventas', df['Indicador_ventas'] < -1, '< -100 %', hallazgos)
+    for columna in INDICADORES_PORCENTAJE:
+        _normalizar_escala(df, columna, hallazgos)
+        _fuera_de_rango(df, columna, (df[columna] < 0) | (df[columna] > 100), '0–100', hallazgos)
+
+    _verificar_referencias(df, 'Municipio', MUNICIPIOS_QUINDIO + CORREGIMIENTOS_QUINDIO, hallazgos)
+    _verificar_referencias(df, 'Género', GENEROS, hallazgos)
+
+    sin_empresa = df['Nit'].isna() & df['Nombre_de_la_empresa'].isna() & df['Nombre'].isna()
+    if sin_empresa.any():
+        hallazgos.append(_hallazgo('Sin identificador de empresa', 'Nit / Nombre', sin_empresa.sum(), "Solo reportado"))
+
+    # Varias filas idénticas son normales (una por sesión), pero se informan
+    duplicadas = df.duplicated()
+    if duplicadas.any():
+        hallazgos.append(_hallazgo('Filas idénticas', '(todas)', duplicadas.sum(), "Solo reportado"))
+
+    return df, hallazgos
+
+
+def validar_talleres(df, archivo):
+    hallazgos = []
+    _verificar_esquema(df, COLUMNAS_TALLERES, archivo)
+    _limpiar_textos(df, hallazgos)
+    _convertir_numericas(df, ['Horas', 'Participantes'], hallazgos)
+    _fuera_de_rango(df, 'Horas', df['Horas'] < 0, 'negativo', hallazgos)
+    _fuera_de_rango(df, 'Participantes', df['Participantes'] < 0, 'negativo', hallazgos)
+
+    # Las fechas llegan como '15-April-2025' o '2025-04-15'
+    fecha_dt = pd.to_datetime(df['Fecha'], format='%d-%B-%Y', errors='coerce')
+    fecha_dt = fecha_dt.fillna(pd.to_datetime(df['Fecha'], format='ISO8601', errors='coerce'))
+    sin_fecha = df['Fecha'].notna() & fecha_dt.isna()
+    if sin_fecha.any():
+        hallazgos.append(_hallazgo('Fecha no reconocida', 'Fecha', sin_fecha.sum(), "Excluida de la evolución mensual"))
+    df['Fecha_dt'] = fecha_dt
+    df['Año'] = fecha_dt.dt.year
+
+    duplicadas = df.duplicated()
+    if duplicadas.any():
+        hallazgos.append(_hallazgo('Filas idénticas', '(todas)', duplicadas.sum(), "Solo reportado"))
+
+    return df, hallazgos
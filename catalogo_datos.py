@@ -0,0 +1,229 @@
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from calidad_datos import ErrorEsquema, _hallazgo, validar_intervenciones, validar_talleres
+from series_tiempo import AcumuladoTemporal
+
+# ============================================================================
+# CATÁLOGO DE FUENTES
+# ============================================================================
+# Cada fuente es un archivo de una cámara (o de un año) que se registra en
+# 'catalogo_fuentes.json'. Si el archivo no existe se usan los libros incluidos
+# en el repositorio.
+ARCHIVO_CATALOGO = 'catalogo_fuentes.json'
+
+FUENTES_PREDETERMINADAS = [
+    {'fuente': 'CCAQ', 'tipo': 'intervenciones', 'archivo': 'transformacion_completamente_dividido.xlsx'},
+    {'fuente': 'CCAQ', 'tipo': 'talleres', 'archivo': 'Horas_talleres.xlsx'},
+]
+
+
+@dataclass(frozen=True)
+class FuenteDatos:
+    fuente: str
+    tipo: str
+    archivo: str
+
+
+def leer_catalogo(ruta=ARCHIVO_CATALOGO):
+    if os.path.exists(ruta):
+        with open(ruta, encoding='utf-8') as f:
+            registros = json.load(f)['fuentes']
+    else:
+        registros = FUENTES_PREDETERMINADAS
+
+    fuentes = [FuenteDatos(r['fuente'], r['tipo'], r['archivo']) for r in registros]
+    tipos_invalidos = {f.tipo for f in fuentes} - set(LECTORES)
+    if tipos_invalidos:
+        raise ValueError(f"Tipo de fuente desconocido en el catálogo: {', '.join(sorted(tipos_invalidos))}")
+    return fuentes
+
+
+def huella_fuentes(fuentes):
+    # Cambia cuando se modifica, agrega o elimina cualquier archivo del catálogo
+    partes = []
+    for f in fuentes:
+        if os.path.exists(f.archivo):
+            estado = os.stat(f.archivo)
+            partes.append(f"{f.fuente}|{f.tipo}|{f.archivo}|{estado.st_size}|{estado.st_mtime_ns}")
+        else:
+            partes.append(f"{f.fuente}|{f.tipo}|{f.archivo}|-")
+    return hashlib.sha1('\n'.join(partes).encode('utf-8')).hexdigest()
+
+
+# ============================================================================
+# LECTURA DE ARCHIVOS (se ejecuta en los procesos del pool)
+# ============================================================================
+def _leer_intervenciones(archivo):
+    df, hallazgos = validar_intervenciones(pd.read_excel(archivo), archivo)
+
+    # Crear identificador único de empresa (prioridad: NIT > Nombre_empresa > Nombre)
+    df['empresa_id'] = df['Nit'].fillna(df['Nombre_de_la_empresa']).fillna(df['Nombre'])
+
+    return df, hallazgos
+
+
+def _leer_talleres(archivo):
+    return validar_talleres(pd.read_excel(archivo), archivo)
+
+
+LECTORES = {
+    'intervenciones': _leer_intervenciones,
+    'talleres': _leer_talleres,
+}
+
+# Columna que define el año de cada partición según el tipo de fuente
+COLUMNA_AÑO = {
+    'intervenciones': 'Año_Ejecución',
+    'talleres': 'Año',
+}
+
+
+# Acumulados por periodo de cada tipo: las intervenciones solo tienen año de
+# ejecución; los talleres tienen fecha
+ACUMULADOS = {
+    'intervenciones': {
+        'columna': 'Año_Ejecución', 'frecuencias': ['Y'], 'dimensiones': ['Programa', 'Municipio', 'Tema'],
+        'medidas': {'Intervenciones': None, 'Horas': 'No_horas_de_consultoría'},
+    },
+    'talleres': {
+        'columna': 'Fecha_dt', 'frecuencias': ['M', 'Q', 'Y'], 'dimensiones': ['Tema'],
+        'medidas': {'Talleres': None, 'Participantes': 'Participantes', 'Horas': 'Horas'},
+    },
+}
+
+
+def _ingerir(fuente):
+    # Un archivo que no existe o sin las columnas requeridas se omite con un
+    # hallazgo; el resto del catálogo se carga igual
+    try:
+        df, hallazgos = LECTORES[fuente.tipo](fuente.archivo)
+    except FileNotFoundError:
+        df, hallazgos = None, [_hallazgo('Archivo no encontrado', '(archivo)', 0, "Archivo omitido")]
+    except ErrorEsquema as e:
+        df, hallazgos = None, [_hallazgo('Esquema', ', '.join(e.faltantes), e.filas, "Archivo omitido")]
+    for hallazgo in hallazgos:
+        hallazgo.update({'Fuente': fuente.fuente, 'Archivo': fuente.archivo})
+    if df is not None:
+        df['Fuente'] = fuente.fuente
+    return fuente, df, hallazgos
+
+
+# ============================================================================
+# ALMACÉN PARTICIONADO POR FUENTE Y AÑO
+# ============================================================================
+class AlmacenParticionado:
+    def __init__(self, columna_año, acumulado=None):
+        self.columna_año = columna_año
+        # Totales por periodo, actualizados con cada archivo agregado
+        self.acumulado = acumulado
+        # Todas las filas, unidas una sola vez al ingerir (solo lectura)
+        self.datos = None
+        # Posiciones en 'datos' de las filas de cada partición (fuente, año)
+        self.particiones = {}
+        # Programas presentes en cada partición (para la poda por Programa)
+        self.programas = {}
+        # Hallazgos de la validación de calidad de cada archivo agregado
+        self.calidad = []
+        self._filas = 0
+
+    def agregar(self, fuente, df):
+        # Índice global continuo: el orden de las filas es el de ingesta
+        inicio = self._filas
+        df.index = pd.RangeIndex(inicio, inicio + len(df))
+        self._filas += len(df)
+        self.datos = df if self.datos is None else pd.concat([self.datos, df])
+
+        for año, posiciones in df.groupby(self.columna_año, dropna=False, sort=True).indices.items():
+            clave = (fuente, int(año) if pd.notna(año) else None)
+            posiciones = posiciones + inicio
+            if clave in self.particiones:
+                # Varios archivos de la misma fuente pueden traer el mismo año
+                posiciones = np.concatenate([self.particiones[clave], posiciones])
+            self.particiones[clave] = posiciones
+            if 'Programa' in df.columns:
+                self.programas[clave] = frozenset(self.datos['Programa'].iloc[posiciones].dropna().unique())
+
+        if self.acumulado is not None:
+            self.acumulado.agregar(df)
+
+    def claves(self, años=None, programas=None):
+        seleccion = []
+        for clave in self.particiones:
+            if años is not None and clave[1] not in años:
+                continue
+            if programas is not None and not self.programas.get(clave, frozenset()) & set(programas):
+                continue
+            seleccion.append(clave)
+        return seleccion
+
+    def unir(self, claves=None):
+        # Con todas las particiones se devuelven los datos tal cual, sin copiar
+        if claves is None or len(claves) == len(self.particiones):
+            return self.datos
+        if not claves:
+            return self.datos.iloc[0:0]
+        return self.datos.iloc[np.sort(np.concatenate([self.particiones[c] for c in claves]))]
+
+    def podar(self, años=None, programas=None):
+        # Solo se toman las filas de las particiones que pueden contener los filtros
+        return self.unir(self.claves(años, programas))
+
+    def __len__(self):
+        return self._filas
+
+
+# ============================================================================
+# FILTROS DEL DASHBOARD
+# ============================================================================
+def filtrar_intervenciones(almacen, filtros):
+    # filtros: columna -> valores seleccionados (solo los filtros activos)
+    df_filtrado = almacen.podar(años=filtros.get('Año_Ejecución'), programas=filtros.get('Programa'))
+
+    for columna, valores in filtros.items():
+        if columna == 'Año_Ejecución':
+            continue  # Resuelto por la poda de particiones
+        df_filtrado = df_filtrado[df_filtrado[columna].isin(valores)]
+
+    return df_filtrado
+
+
+# Archivos a partir de los cuales la lectura en paralelo compensa iniciar los procesos
+MINIMO_ARCHIVOS_PARALELO = 4
+
+
+def cargar_almacenes(fuentes, max_procesos=None):
+    # Con catálogos grandes los archivos se leen en paralelo. Los procesos se
+    # crean con 'spawn': el servidor de Streamlit tiene varios hilos y hacer
+    # 'fork' de un proceso con hilos no es seguro. Iniciar cada proceso cuesta
+    # más que leer uno o dos libros, así que con pocos archivos (o con un solo
+    # núcleo) se lee en serie.
+    max_procesos = max_procesos or min(len(fuentes), os.cpu_count() or 1)
+    if len(fuentes) >= MINIMO_ARCHIVOS_PARALELO and max_procesos > 1:
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_procesos, mp_context=contexto) as pool:
+            resultados = list(pool.map(_ingerir, fuentes))
+    else:
+        resultados = [_ingerir(f) for f in fuentes]
+
+    almacenes = {}
+    # Archivos omitidos: (fuente, hallazgo con el motivo)
+    faltantes = []
+    for fuente, df, hallazgos in resultados:
+        if df is None:
+            faltantes.append((fuente, hallazgos[0]))
+            continue
+        if fuente.tipo not in almacenes:
+            almacenes[fuente.tipo] = AlmacenParticionado(COLUMNA_AÑO[fuente.tipo], AcumuladoTemporal(**ACUMULADOS[fuente.tipo]))
+        almacen = almacenes[fuente.tipo]
+        almacen.agregar(fuente.fuente, df)
+        almacen.calidad.extend(hallazgos)
+
+    return almacenes, faltantes
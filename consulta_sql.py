@@ -0,0 +1,118 @@
+import numbers
+import sqlite3
+import time
+import uuid
+
+import pandas as pd
+
+# ============================================================================
+# MOTOR SQL EMBEBIDO (SQLite en memoria)
+# ============================================================================
+# Las tablas normalizadas se cargan una sola vez en una base en memoria
+# compartida. Cada consulta abre su propia conexión, donde los filtros del
+# sidebar se aplican como la vista temporal 'intervenciones_filtradas'.
+
+# Columnas indexadas: las que usan los filtros y las agrupaciones habituales
+COLUMNAS_INDEXADAS = ['Programa', 'Fase', 'Cohorte', 'Año_Ejecución', 'Municipio', 'Sector', 'Género', 'Tema', 'empresa_id']
+
+# Operaciones permitidas al SQL del usuario: solo lectura
+_ACCIONES_PERMITIDAS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+# Tiempo máximo por consulta: una CTE recursiva sin fin o un producto cruzado
+# grande no deben bloquear el servidor compartido
+LIMITE_SEGUNDOS_CONSULTA = 5
+# Cada cuántas instrucciones de SQLite se revisa el límite
+_INSTRUCCIONES_ENTRE_REVISIONES = 10000
+
+# Tamaño máximo de un texto, BLOB o fila (el límite de tiempo no frena una sola
+# reserva grande de memoria) y del texto SQL de la consulta
+LIMITE_BYTES_VALOR = 4 * 1024 * 1024
+LIMITE_BYTES_SQL = 100 * 1024
+
+# Funciones que solo sirven para generar datos grandes
+_FUNCIONES_DENEGADAS = {'randomblob', 'zeroblob'}
+
+CONSULTA_EJEMPLO = """SELECT Municipio, Programa,
+       COUNT(*) AS Intervenciones,
+       COUNT(DISTINCT empresa_id) AS Empresas,
+       ROUND(SUM("No_horas_de_consultoría"), 1) AS Horas
+FROM intervenciones_filtradas
+GROUP BY Municipio, Programa
+ORDER BY Intervenciones DESC"""
+
+
+def _identificador(nombre):
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def _literal(valor):
+    if isinstance(valor, numbers.Number) and not isinstance(valor, bool):
+        return repr(valor.item() if hasattr(valor, 'item') else valor)
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def _condicion(columna, valores):
+    return f"{_identificador(columna)} IN ({', '.join(_literal(v) for v in valores)})"
+
+
+def _autorizador(accion, _arg1, arg2, *_):
+    # En SQLITE_FUNCTION el segundo argumento es el nombre de la función
+    if accion == sqlite3.SQLITE_FUNCTION and str(arg2).lower() in _FUNCIONES_DENEGADAS:
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK if accion in _ACCIONES_PERMITIDAS else sqlite3.SQLITE_DENY
+
+
+class MotorConsultas:
+    def __init__(self, df, df_talleres=None):
+        self._uri = f"file:consulta_{uuid.uuid4().hex}?mode=memory&cache=shared"
+        # Esta conexión mantiene viva la base en memoria mientras exista el motor
+        self._base = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+
+        df.to_sql('intervenciones', self._base, index=False)
+        for columna in COLUMNAS_INDEXADAS:
+            if columna in df.columns:
+                self._base.execute(f"CREATE INDEX {_identificador('idx_' + columna)} ON intervenciones ({_identificador(columna)})")
+        if df_talleres is not None:
+            df_talleres.to_sql('talleres', self._base, index=False)
+        self._base.commit()
+
+    def tamaño(self):
+        # Bytes que ocupa la base en memoria
+        paginas = self._base.execute("PRAGMA page_count").fetchone()[0]
+        return paginas * self._base.execute("PRAGMA page_size").fetchone()[0]
+
+    def _conectar(self, filtros):
+        conexion = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        condiciones = [_condicion(columna, valores) for columna, valores in filtros.items()]
+        where = f" WHERE {' AND '.join(condiciones)}" if condiciones else ''
+        conexion.execute(f"CREATE TEMP VIEW intervenciones_filtradas AS SELECT * FROM intervenciones{where}")
+        conexion.set_authorizer(_autorizador)
+        conexion.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, LIMITE_BYTES_VALOR)
+        conexion.setlimit(sqlite3.SQLITE_LIMIT_SQL_LENGTH, LIMITE_BYTES_SQL)
+        return conexion
+
+    def paginar(self, sql, filtros, pagina=1, tamaño=50):
+        # Devuelve (página de resultados, hay_más_páginas). Solo se leen de la
+        # base las filas de la página pedida, más una para saber si hay otra.
+        sql = sql.strip().rstrip(';')
+        conexion = self._conectar(filtros)
+        limite = time.monotonic() + LIMITE_SEGUNDOS_CONSULTA
+        # Un valor distinto de cero interrumpe la consulta con sqlite3.OperationalError
+        conexion.set_progress_handler(lambda: time.monotonic() > limite, _INSTRUCCIONES_ENTRE_REVISIONES)
+        try:
+            # La consulta va en sus propias líneas: un comentario '--' al final
+            # no debe ocultar el paréntesis de cierre
+            cursor = conexion.execute(f"SELECT * FROM (\n{sql}\n) LIMIT ? OFFSET ?", (tamaño + 1, (pagina - 1) * tamaño))
+            filas = cursor.fetchmany(tamaño + 1)
+            columnas = [d[0] for d in cursor.description]
+        except sqlite3.OperationalError:
+            if time.monotonic() > limite:
+                raise sqlite3.OperationalError(f"la consulta superó el límite de {LIMITE_SEGUNDOS_CONSULTA} s y se canceló") from None
+            raise
+        finally:
+            conexion.close()
+
+        hay_mas = len(filas) > tamaño
+        resultado = pd.DataFrame(filas[:tamaño], columns=columnas)
+        resultado.index = range((pagina - 1) * tamaño + 1, (pagina - 1) * tamaño + len(resultado) + 1)
+        return resultado, hay_mas
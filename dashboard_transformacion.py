@@ -1,9 +1,16 @@
+import hmac
+import os
+import sqlite3
+from io import BytesIO
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
+from catalogo_datos import ARCHIVO_CATALOGO, cargar_almacenes, filtrar_intervenciones, huella_fuentes, leer_catalogo
+from consulta_sql import CONSULTA_EJEMPLO, MotorConsultas
+from graficas import ESTILOS_CSS, construir_vista, grafica_evolucion_talleres, grafica_mapa, tarjeta_metrica, vista_desde_json
+from mapa_quindio import MEDIDAS_MAPA, agregados_municipio, cargar_ubicaciones, precalcular_cubo
+from memoria import GestorMemoria
+from series_tiempo import FRECUENCIAS
+from reportes import buscar_instantanea, clave_filtros, leer_indice
 
 # ============================================================================
 # CONFIGURACIÓN DE LA PÁGINA
@@ -18,58 +25,111 @@ st.set_page_config(
 # ============================================================================
 # ESTILOS CSS PERSONALIZADOS
 # ============================================================================
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;700&display=swap');
-    .main { background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%); }
-    .metric-card { background: white; padding: 10px; border-radius: 15px; box-shadow: 0 4px 6px rgba(0,0,0,0.07); border-left: 5px solid; margin: 10px 0; transition: transform 0.2s; }
-    .metric-card:hover { transform: translateY(-5px); box-shadow: 0 8px 12px rgba(0,0,0,0.15); }
-    .metric-value { font-size: 1.5em; font-weight: 700; font-family: 'Poppins', sans-serif; margin: 10px 0; }
-    .metric-label { font-size: 0.60em; color: #666; font-weight: 500; text-transform: uppercase; letter-spacing: 1px; }
-    .metric-empresas { border-color: #667eea; } .metric-empresas .metric-value { color: #667eea; }
-    .metric-municipio { border-color: #f093fb; } .metric-municipio .metric-value { color: #f093fb; }
-    .metric-sector { border-color: #4facfe; } .metric-sector .metric-value { color: #4facfe; }
-    .metric-horas { border-color: #43e97b; } .metric-horas .metric-value { color: #43e97b; }
-    .metric-unique { border-color: #fa709a; } .metric-unique .metric-value { color: #fa709a; }
-    h1, h2, h3 { font-family: 'Poppins', sans-serif; color: #2d3748; font-weight: 600; }
-    .stMultiSelect label { font-weight: 600; color: #2d3748; }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(ESTILOS_CSS, unsafe_allow_html=True)
 
 # ============================================================================
 # FUNCIÓN PARA CARGAR DATOS
 # ============================================================================
-@st.cache_data
+@st.cache_resource
+def gestor_memoria():
+    # Presupuesto de memoria compartido por todas las sesiones (DASHBOARD_MEMORIA_MB)
+    return GestorMemoria()
+
+@st.cache_resource
+def cargar_catalogo():
+    # Todas las fuentes registradas (cámaras y años) se leen una sola vez y se
+    # guardan en almacenes particionados por fuente y año. El tamaño de cada
+    # almacén incluye sus filas: cargar_datos() y cargar_talleres() devuelven
+    # esos mismos DataFrames, compartidos por todas las sesiones.
+    almacenes, faltantes = cargar_almacenes(leer_catalogo())
+    for tipo, almacen in almacenes.items():
+        gestor_memoria().fijar('Catálogo', tipo, almacen)
+    return almacenes, faltantes
+
+# Solo lectura: cache_resource entrega el mismo objeto a todas las sesiones
+# en lugar de una copia por ejecución
+@st.cache_resource
 def cargar_datos():
-    try:
-        df = pd.read_excel('transformacion_completamente_dividido.xlsx')
-    except FileNotFoundError:
-        st.error("⚠️ No se encontró el archivo 'transformacion_completamente_dividido.xlsx'")
-        st.stop()
-    
-    df['No_horas_de_consultoría'] = pd.to_numeric(df['No_horas_de_consultoría'], errors='coerce')
-    df['Indicador_satisfacción'] = pd.to_numeric(df['Indicador_satisfacción'], errors='coerce')
-    df['Indicador_ventas'] = pd.to_numeric(df['Indicador_ventas'], errors='coerce')
-    df['Indicador_procesos_tecnologicos'] = pd.to_numeric(df['Indicador_procesos_tecnologicos'], errors='coerce')
-    df['Indicador_presencia_en_linea'] = pd.to_numeric(df['Indicador_presencia_en_linea'], errors='coerce')
-    
-    # Crear identificador único de empresa (prioridad: NIT > Nombre_empresa > Nombre)
-    df['empresa_id'] = df['Nit'].fillna(df['Nombre_de_la_empresa']).fillna(df['Nombre'])
-    
-    return df
+    return cargar_catalogo()[0]['intervenciones'].unir()
 
-@st.cache_data
+@st.cache_resource
 def cargar_talleres():
-    try:
-        df_tall = pd.read_excel('Horas_talleres.xlsx')
-        df_tall['Fecha_dt'] = pd.to_datetime(df_tall['Fecha '], format='%d-%B-%Y', errors='coerce')
-        df_tall['Año'] = df_tall['Fecha_dt'].dt.year
-        return df_tall
-    except FileNotFoundError:
+    almacenes, _ = cargar_catalogo()
+    if 'talleres' not in almacenes:
         return None
+    return almacenes['talleres'].unir()
+
+@st.cache_resource
+def cargar_reporte_calidad():
+    # Hallazgos de la validación hecha al ingerir cada archivo del catálogo
+    almacenes, faltantes = cargar_catalogo()
+    hallazgos = [h for almacen in almacenes.values() for h in almacen.calidad] + [h for _, h in faltantes]
+    columnas = ['Fuente', 'Archivo', 'Verificación', 'Columna', 'Filas', 'Acción']
+    reporte = pd.DataFrame(hallazgos, columns=columnas, index=range(1, len(hallazgos) + 1))
+    return gestor_memoria().fijar('Calidad', 'reporte', reporte)
+
+@st.cache_resource
+def huella_datos():
+    # Identifica la versión de los archivos cargados; los reportes pre-generados
+    # solo se sirven si se construyeron con la misma versión
+    return huella_fuentes(leer_catalogo())
+
+@st.cache_data(ttl=300, max_entries=1)
+def cargar_indice_reportes():
+    return leer_indice()
+
+def cargar_instantanea(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return vista_desde_json(f.read())
+
+@st.cache_resource
+def cargar_motor_consultas():
+    motor = MotorConsultas(cargar_datos(), cargar_talleres())
+    return gestor_memoria().fijar('Motor SQL', 'base', motor, motor.tamaño())
+
+@st.cache_resource
+def cargar_mapa():
+    # Ubicaciones de cabeceras y corregimientos, leídas una sola vez
+    return gestor_memoria().fijar('Mapa', 'ubicaciones', cargar_ubicaciones())
+
+@st.cache_resource
+def cargar_cubo_municipios():
+    return gestor_memoria().fijar('Mapa', 'cubo', precalcular_cubo(cargar_datos()))
+
+def a_excel(df_excel, **opciones):
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df_excel.to_excel(writer, **opciones)
+    return output.getvalue()
+
+# Los archivos omitidos se avisan en cada ejecución (fuera de las funciones en
+# caché, que otras funciones en caché también llaman)
+almacenes, faltantes = cargar_catalogo()
+for fuente, hallazgo in faltantes:
+    if fuente.tipo == 'intervenciones':
+        motivo = f"le faltan las columnas {hallazgo['Columna']}" if hallazgo['Verificación'] == 'Esquema' else "no se encontró"
+        st.warning(f"⚠️ Se omitió el archivo '{fuente.archivo}' ({fuente.fuente}): {motivo}")
+if 'intervenciones' not in almacenes:
+    archivos = [f"'{fuente.archivo}'" for fuente, _ in faltantes if fuente.tipo == 'intervenciones']
+    if archivos:
+        st.error(f"⚠️ No se pudo cargar ningún archivo de intervenciones: {', '.join(archivos)}")
+    else:
+        st.error(f"⚠️ El catálogo ('{ARCHIVO_CATALOGO}') no registra archivos de intervenciones")
+    st.stop()
 
 df = cargar_datos()
 df_talleres = cargar_talleres()
+almacen_intervenciones = almacenes['intervenciones']
+gestor = gestor_memoria()
+
+# Panel de administración: ?admin=<DASHBOARD_TOKEN_ADMIN>. El parámetro se
+# quita de la URL apenas se lee para que no viaje en los enlaces compartidos;
+# sin token configurado el panel no se muestra.
+if 'admin' in st.query_params:
+    token_admin = os.environ.get('DASHBOARD_TOKEN_ADMIN', '')
+    st.session_state.admin = bool(token_admin) and hmac.compare_digest(
+        st.query_params['admin'].encode('utf-8'), token_admin.encode('utf-8'))
+    del st.query_params['admin']
 
 # ============================================================================
 # SIDEBAR - FILTROS
@@ -77,62 +137,92 @@ df_talleres = cargar_talleres()
 st.sidebar.image("https://via.placeholder.com/300x100/667eea/ffffff?text=Transformación+Digital", use_container_width=True)
 st.sidebar.title("🎯 Filtros")
 
-programas_disponibles = ['Todos'] + sorted([p for p in df['Programa'].dropna().unique() if str(p) != 'NAN'])
-programa_seleccionado = st.sidebar.multiselect("📊 Programa", programas_disponibles, ['Todos'])
+# Parámetro de la URL de cada filtro (?municipio=ARMENIA&municipio=CALARCÁ&anio=2024)
+PARAMETROS_URL = {
+    'Programa': 'programa', 'Fase': 'fase', 'Cohorte': 'cohorte', 'Año_Ejecución': 'anio',
+    'Municipio': 'municipio', 'Sector': 'sector', 'Género': 'genero',
+}
+
+# El enlace solo se lee en la primera ejecución de la sesión; después mandan
+# los widgets (si el valor por defecto cambiara, Streamlit reiniciaría el widget)
+if 'filtros_url' not in st.session_state:
+    st.session_state.filtros_url = {p: st.query_params.get_all(p) for p in PARAMETROS_URL.values()}
+
+def seleccion_inicial(columna, disponibles):
+    por_texto = {str(v): v for v in disponibles if v != 'Todos'}
+    valores = [por_texto[v] for v in st.session_state.filtros_url[PARAMETROS_URL[columna]] if v in por_texto]
+    return valores or ['Todos']
+
+programas_disponibles = ['Todos'] + sorted(df['Programa'].dropna().unique())
+programa_seleccionado = st.sidebar.multiselect("📊 Programa", programas_disponibles, seleccion_inicial('Programa', programas_disponibles))
 
 # NUEVO FILTRO: Fase
-fases_disponibles = ['Todos'] + sorted([f for f in df['Fase'].unique() if pd.notna(f) and str(f) != 'NAN'])
-fase_seleccionada = st.sidebar.multiselect("🔄 Fase", fases_disponibles, ['Todos'])
+fases_disponibles = ['Todos'] + sorted(df['Fase'].dropna().unique())
+fase_seleccionada = st.sidebar.multiselect("🔄 Fase", fases_disponibles, seleccion_inicial('Fase', fases_disponibles))
 
-cohortes_disponibles = ['Todos'] + sorted([c for c in df['Cohorte'].unique() if pd.notna(c)])
-cohorte_seleccionada = st.sidebar.multiselect("📅 Cohorte", cohortes_disponibles, ['Todos'])
+cohortes_disponibles = ['Todos'] + sorted(df['Cohorte'].dropna().unique())
+cohorte_seleccionada = st.sidebar.multiselect("📅 Cohorte", cohortes_disponibles, seleccion_inicial('Cohorte', cohortes_disponibles))
 
 # NUEVO FILTRO: Año
 años_disponibles = ['Todos'] + sorted([int(a) for a in df['Año_Ejecución'].dropna().unique()])
-año_seleccionado = st.sidebar.multiselect("📆 Año", años_disponibles, ['Todos'])
+año_seleccionado = st.sidebar.multiselect("📆 Año", años_disponibles, seleccion_inicial('Año_Ejecución', años_disponibles))
+
+municipios_disponibles = ['Todos'] + sorted(df['Municipio'].dropna().unique())
+municipio_seleccionado = st.sidebar.multiselect("📍 Municipio", municipios_disponibles, seleccion_inicial('Municipio', municipios_disponibles))
+
+sectores_disponibles = ['Todos'] + sorted(df['Sector'].dropna().unique())
+sector_seleccionado = st.sidebar.multiselect("🏢 Sector", sectores_disponibles, seleccion_inicial('Sector', sectores_disponibles))
 
-municipios_disponibles = ['Todos'] + sorted([m for m in df['Municipio'].dropna().unique() if str(m) != 'NAN'])
-municipio_seleccionado = st.sidebar.multiselect("📍 Municipio", municipios_disponibles, ['Todos'])
+generos_disponibles = ['Todos'] + sorted(df['Género'].dropna().unique())
+genero_seleccionado = st.sidebar.multiselect("👥 Género", generos_disponibles, seleccion_inicial('Género', generos_disponibles))
 
-sectores_validos = df[(df['Sector'].notna()) & (df['Sector'] != 'NAN')]['Sector'].unique()
-sectores_disponibles = ['Todos'] + sorted(sectores_validos.tolist())
-sector_seleccionado = st.sidebar.multiselect("🏢 Sector", sectores_disponibles, ['Todos'])
+st.sidebar.caption("🔗 El enlace de esta página conserva los filtros seleccionados")
 
-generos_disponibles = ['Todos'] + sorted([g for g in df['Género'].dropna().unique() if str(g) != 'NAN'])
-genero_seleccionado = st.sidebar.multiselect("👥 Género", generos_disponibles, ['Todos'])
+st.sidebar.markdown("---")
+modo_consulta = st.sidebar.toggle("🧮 Consulta avanzada (SQL)", value=False)
 
 # ============================================================================
 # APLICAR FILTROS
 # ============================================================================
-df_filtrado = df.copy()
+# Filtros activos del sidebar (columna -> valores seleccionados)
+filtros = {columna: seleccion for columna, seleccion in [
+    ('Programa', programa_seleccionado), ('Fase', fase_seleccionada), ('Cohorte', cohorte_seleccionada),
+    ('Año_Ejecución', año_seleccionado), ('Municipio', municipio_seleccionado),
+    ('Sector', sector_seleccionado), ('Género', genero_seleccionado),
+] if seleccion and 'Todos' not in seleccion}
 
-if programa_seleccionado and 'Todos' not in programa_seleccionado:
-    df_filtrado = df_filtrado[df_filtrado['Programa'].isin(programa_seleccionado)]
-if fase_seleccionada and 'Todos' not in fase_seleccionada:
-    df_filtrado = df_filtrado[(df_filtrado['Fase'].isin(fase_seleccionada)) | (df_filtrado['Fase'].isna())]
-if cohorte_seleccionada and 'Todos' not in cohorte_seleccionada:
-    df_filtrado = df_filtrado[(df_filtrado['Cohorte'].isin(cohorte_seleccionada)) | (df_filtrado['Cohorte'].isna())]
-if año_seleccionado and 'Todos' not in año_seleccionado:
-    df_filtrado = df_filtrado[df_filtrado['Año_Ejecución'].isin(año_seleccionado)]
-if municipio_seleccionado and 'Todos' not in municipio_seleccionado:
-    df_filtrado = df_filtrado[df_filtrado['Municipio'].isin(municipio_seleccionado)]
-if sector_seleccionado and 'Todos' not in sector_seleccionado:
-    df_filtrado = df_filtrado[df_filtrado['Sector'].isin(sector_seleccionado)]
-if genero_seleccionado and 'Todos' not in genero_seleccionado:
-    df_filtrado = df_filtrado[df_filtrado['Género'].isin(genero_seleccionado)]
+# La URL refleja los filtros activos para poder compartir la vista
+for columna, parametro in PARAMETROS_URL.items():
+    if columna in filtros:
+        st.query_params[parametro] = [str(v) for v in filtros[columna]]
+    elif parametro in st.query_params:
+        del st.query_params[parametro]
+
+# Los resultados de cada combinación de filtros se guardan en el gestor de
+# memoria, compartidos entre sesiones: un enlace que circula en el equipo se
+# calcula una sola vez
+clave = clave_filtros(filtros)
+
+# Poda de particiones: solo se toman las (fuente, año) que tocan Año y Programa.
+# Sin filtros son los mismos datos base (ya contados en el catálogo).
+if filtros:
+    df_filtrado = gestor.obtener('Datos filtrados', clave, lambda: filtrar_intervenciones(almacen_intervenciones, filtros))
+else:
+    df_filtrado = df
 
 # ============================================================================
-# MÉTRICAS
+# MÉTRICAS Y GRÁFICAS
 # ============================================================================
-total_intervenciones = len(df_filtrado)
-empresas_unicas = df_filtrado['empresa_id'].nunique()
-
-# Separar Municipios (12) y Corregimientos (1 - Barcelona)
-municipios_count = df_filtrado[df_filtrado['Municipio'] != 'BARCELONA']['Municipio'].nunique()
-corregimientos_count = 1 if 'BARCELONA' in df_filtrado['Municipio'].values else 0
+# Si existe un reporte pre-generado para estos filtros se sirve directamente
+ruta_instantanea = buscar_instantanea(cargar_indice_reportes(), filtros, huella_datos())
+if ruta_instantanea:
+    vista = gestor.obtener('Vistas', ruta_instantanea, lambda: cargar_instantanea(ruta_instantanea))
+else:
+    acumulados = {tipo: almacen.acumulado for tipo, almacen in cargar_catalogo()[0].items()}
+    vista = gestor.obtener('Vistas', clave, lambda: construir_vista(df_filtrado, df_talleres, acumulados, filtros))
 
-sectores_atendidos = df_filtrado[(df_filtrado['Sector'].notna()) & (df_filtrado['Sector'] != 'NAN')]['Sector'].nunique()
-total_horas = df_filtrado['No_horas_de_consultoría'].sum()
+metricas = vista['metricas']
+figuras = vista['figuras']
 
 # ============================================================================
 # HEADER
@@ -146,19 +236,19 @@ st.markdown("---")
 col1, col2, col3, col4, col5, col6 = st.columns(6)
 
 with col1:
-    st.markdown(f'<div class="metric-card metric-empresas"><div class="metric-label">Intervenciones</div><div class="metric-value">{total_intervenciones:,}</div></div>', unsafe_allow_html=True)
+    st.markdown(tarjeta_metrica('metric-empresas', 'Intervenciones', f"{metricas['total_intervenciones']:,}"), unsafe_allow_html=True)
 with col2:
-    st.markdown(f'<div class="metric-card metric-unique"><div class="metric-label">Empresas Únicas</div><div class="metric-value">{empresas_unicas:,}</div></div>', unsafe_allow_html=True)
+    st.markdown(tarjeta_metrica('metric-unique', 'Empresas Únicas', f"{metricas['empresas_unicas']:,}"), unsafe_allow_html=True)
 with col3:
-    st.markdown(f'<div class="metric-card metric-municipio"><div class="metric-label">Municipios</div><div class="metric-value">{municipios_count}</div></div>', unsafe_allow_html=True)
+    st.markdown(tarjeta_metrica('metric-municipio', 'Municipios', metricas['municipios_count']), unsafe_allow_html=True)
 with col4:
-    st.markdown(f'<div class="metric-card metric-sector"><div class="metric-label">Corregimientos</div><div class="metric-value">{corregimientos_count}</div></div>', unsafe_allow_html=True)
+    st.markdown(tarjeta_metrica('metric-sector', 'Corregimientos', metricas['corregimientos_count']), unsafe_allow_html=True)
 with col5:
-    st.markdown(f'<div class="metric-card metric-sector"><div class="metric-label">Sectores</div><div class="metric-value">{sectores_atendidos}</div></div>', unsafe_allow_html=True)
+    st.markdown(tarjeta_metrica('metric-sector', 'Sectores', metricas['sectores_atendidos']), unsafe_allow_html=True)
 with col6:
-    st.markdown(f'<div class="metric-card metric-horas"><div class="metric-label">Horas Consultoría</div><div class="metric-value">{total_horas:,.0f}</div></div>', unsafe_allow_html=True)
+    st.markdown(tarjeta_metrica('metric-horas', 'Horas Consultoría', f"{metricas['total_horas']:,.0f}"), unsafe_allow_html=True)
 
-if total_intervenciones == 0:
+if metricas['total_intervenciones'] == 0:
     st.warning("⚠️ No hay datos disponibles con los filtros seleccionados")
     st.stop()
 
@@ -174,70 +264,48 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("📚 Fase alcanzada por las empresas")
-    tema_data = df_filtrado['Tema'].value_counts()
-    tema_pct = (tema_data / tema_data.sum() * 100).round(1)
-    fig = go.Figure(go.Pie(labels=tema_data.index, values=tema_pct, customdata=tema_data.values,
-                           hovertemplate='<b>%{label}</b><br>Porcentaje: %{value:.1f}%<br>Intervenciones: %{customdata:,}<extra></extra>',
-                           textinfo='percent', marker=dict(colors=px.colors.qualitative.Set3, line=dict(color='white', width=2))))
-    fig.update_layout(height=500, showlegend=True, font=dict(family="Poppins"), paper_bgcolor='rgba(0,0,0,0)', margin=dict(t=20,b=20,l=20,r=20))
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras['tema'], use_container_width=True)
 
 with col2:
     st.subheader("👥 Distribución por Género")
-    genero_data = df_filtrado['Género'].value_counts().reset_index()
-    genero_data.columns = ['Género', 'Cantidad']
-    colores_genero = {'FEMENINO': '#f093fb', 'MASCULINO': '#4facfe', 'NO APLICA': '#a8edea'}
-    fig = px.pie(genero_data, values='Cantidad', names='Género', hole=0.4, color='Género', color_discrete_map=colores_genero)
-    fig.update_layout(height=500, font=dict(family="Poppins"), paper_bgcolor='rgba(0,0,0,0)', showlegend=True)
-    fig.update_traces(textposition='inside', textinfo='percent+label', textfont_size=12)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras['genero'], use_container_width=True)
 
 # FILA 2: Horas y Municipios (INTERVENCIONES)
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("⏱️ Distribución de Horas de Consultoría")
-    horas_por_tema = df_filtrado.groupby('Tema')['No_horas_de_consultoría'].sum()
-    horas_pct = (horas_por_tema / horas_por_tema.sum() * 100).round(1)
-    fig = go.Figure(go.Pie(labels=horas_por_tema.index, values=horas_pct, customdata=horas_por_tema.values,
-                           hovertemplate='<b>%{label}</b><br>Porcentaje: %{value:.1f}%<br>Horas: %{customdata:,.0f}<extra></extra>',
-                           textinfo='percent', marker=dict(colors=px.colors.qualitative.Pastel, line=dict(color='white', width=2))))
-    fig.update_layout(height=500, showlegend=True, font=dict(family="Poppins"), paper_bgcolor='rgba(0,0,0,0)', margin=dict(t=20,b=20,l=20,r=20))
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras['horas_tema'], use_container_width=True)
 
 with col2:
     st.subheader("📍 Intervenciones por Municipio")
-    municipio_data = df_filtrado['Municipio'].value_counts()
-    municipio_pct = (municipio_data / municipio_data.sum() * 100).round(1)
-    fig = go.Figure(go.Pie(labels=municipio_data.index, values=municipio_pct, customdata=municipio_data.values,
-                           hovertemplate='<b>%{label}</b><br>Porcentaje: %{value:.1f}%<br>Intervenciones: %{customdata:,}<extra></extra>',
-                           textinfo='percent', marker=dict(colors=px.colors.qualitative.Bold, line=dict(color='white', width=2))))
-    fig.update_layout(height=500, showlegend=True, font=dict(family="Poppins"), paper_bgcolor='rgba(0,0,0,0)', margin=dict(t=20,b=20,l=20,r=20))
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras['municipio'], use_container_width=True)
 
 # FILA 3: Sectores y Programas (INTERVENCIONES)
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("🏢 Top 10 Sectores Atendidos")
-    sector_data = df_filtrado[(df_filtrado['Sector'].notna()) & (df_filtrado['Sector'] != 'NAN')]['Sector'].value_counts().head(10)
-    if len(sector_data) > 0:
-        sector_pct = (sector_data / df_filtrado[(df_filtrado['Sector'].notna()) & (df_filtrado['Sector'] != 'NAN')]['Sector'].value_counts().sum() * 100).round(1)
-        fig = go.Figure(go.Pie(labels=sector_data.index, values=sector_pct, customdata=sector_data.values,
-                               hovertemplate='<b>%{label}</b><br>Porcentaje: %{value:.1f}%<br>Intervenciones: %{customdata:,}<extra></extra>',
-                               textinfo='percent', marker=dict(colors=px.colors.qualitative.Vivid, line=dict(color='white', width=2))))
-        fig.update_layout(height=500, showlegend=True, font=dict(family="Poppins"), paper_bgcolor='rgba(0,0,0,0)', margin=dict(t=20,b=20,l=20,r=20))
-        st.plotly_chart(fig, use_container_width=True)
+    if figuras['sector'] is not None:
+        st.plotly_chart(figuras['sector'], use_container_width=True)
 
 with col2:
     st.subheader("📋 Distribución por Programa")
-    programa_data = df_filtrado['Programa'].value_counts()
-    programa_pct = (programa_data / programa_data.sum() * 100).round(1)
-    fig = go.Figure(go.Pie(labels=programa_data.index, values=programa_pct, customdata=programa_data.values,
-                           hovertemplate='<b>%{label}</b><br>Porcentaje: %{value:.1f}%<br>Intervenciones: %{customdata:,}<extra></extra>',
-                           textinfo='percent', marker=dict(colors=px.colors.qualitative.Safe, line=dict(color='white', width=2))))
-    fig.update_layout(height=500, showlegend=True, font=dict(family="Poppins"), paper_bgcolor='rgba(0,0,0,0)', margin=dict(t=20,b=20,l=20,r=20))
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras['programa'], use_container_width=True)
+
+# ============================================================================
+# MAPA POR MUNICIPIO
+# ============================================================================
+st.markdown("---")
+st.header("🗺️ Mapa del Quindío")
+
+medida_mapa = st.radio("Medida", list(MEDIDAS_MAPA), horizontal=True, label_visibility="collapsed")
+agregados_mapa = gestor.obtener('Agregados', 'mapa|' + clave, lambda: agregados_municipio(cargar_cubo_municipios(), filtros))
+fig_mapa = gestor.obtener('Figuras', 'mapa|' + medida_mapa + '|' + clave,
+                          lambda: grafica_mapa(agregados_mapa, cargar_mapa(), MEDIDAS_MAPA[medida_mapa]))
+st.plotly_chart(fig_mapa, use_container_width=True)
+st.caption("Cada burbuja está en la ubicación aproximada de la cabecera municipal; su tamaño y color indican "
+           "la medida seleccionada. Los puntos rojos marcan los corregimientos. No se dibujan límites municipales.")
 
 # ============================================================================
 # NUEVAS GRÁFICAS: EMPRESAS POR MUNICIPIO Y SECTOR
@@ -249,99 +317,30 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("📍 Empresas por Municipio")
-    empresas_municipio = df_filtrado.groupby('Municipio')['empresa_id'].nunique().sort_values(ascending=True)
-    
-    fig = go.Figure(go.Bar(
-        y=empresas_municipio.index,
-        x=empresas_municipio.values,
-        orientation='h',
-        marker=dict(
-            color=empresas_municipio.values,
-            colorscale='Viridis',
-            showscale=True,
-            colorbar=dict(title="Empresas")
-        ),
-        text=empresas_municipio.values,
-        texttemplate='%{text:,}',
-        textposition='outside',
-        hovertemplate='<b>%{y}</b><br>Empresas únicas: %{x:,}<extra></extra>'
-    ))
-    
-    fig.update_layout(
-        height=500,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="Poppins"),
-        xaxis=dict(title="Número de Empresas", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-        yaxis=dict(title=""),
-        margin=dict(t=20,b=20,l=20,r=20)
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras['empresas_municipio'], use_container_width=True)
 
 with col2:
     st.subheader("🏢 Empresas por Sector")
-    empresas_sector = df_filtrado[(df_filtrado['Sector'].notna()) & (df_filtrado['Sector'] != 'NAN')].groupby('Sector')['empresa_id'].nunique().sort_values(ascending=True)
-    
-    fig = go.Figure(go.Bar(
-        y=empresas_sector.index,
-        x=empresas_sector.values,
-        orientation='h',
-        marker=dict(
-            color=empresas_sector.values,
-            colorscale='Blues',
-            showscale=True,
-            colorbar=dict(title="Empresas")
-        ),
-        text=empresas_sector.values,
-        texttemplate='%{text:,}',
-        textposition='outside',
-        hovertemplate='<b>%{y}</b><br>Empresas únicas: %{x:,}<extra></extra>'
-    ))
-    
-    fig.update_layout(
-        height=500,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="Poppins"),
-        xaxis=dict(title="Número de Empresas", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-        yaxis=dict(title=""),
-        margin=dict(t=20,b=20,l=20,r=20)
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras['empresas_sector'], use_container_width=True)
 
 st.markdown("---")
 # INTERVENCIONES POR EMPRESA
 # ============================================================================
 st.header("📊 Análisis de Intervenciones por Empresa")
 
-# USAR empresa_id (que ya está creado en el dataset) para cálculos correctos
-df_filtrado_empresas = df_filtrado.copy()
-
-# Contar intervenciones por empresa_id (el identificador único correcto)
-intervenciones_por_empresa_id = df_filtrado_empresas.groupby('empresa_id').size().sort_values(ascending=False)
-
-# Para mostrar nombres en las gráficas, crear diccionario empresa_id -> nombre
-df_filtrado_empresas['empresa_nombre'] = df_filtrado_empresas['Nombre_de_la_empresa'].fillna(df_filtrado_empresas['Nombre'])
-empresa_id_to_nombre = df_filtrado_empresas.groupby('empresa_id')['empresa_nombre'].first()
+empresas = vista['empresas']
 
 # Métricas principales
 col1, col2, col3, col4 = st.columns(4)
 
-total_empresas_con_interv = len(intervenciones_por_empresa_id)
-promedio_interv = intervenciones_por_empresa_id.mean()
-mediana_interv = intervenciones_por_empresa_id.median()
-max_interv = intervenciones_por_empresa_id.max()
-
 with col1:
-    st.markdown(f'<div class="metric-card metric-empresas"><div class="metric-label">Empresas Analizadas</div><div class="metric-value">{total_empresas_con_interv:,}</div></div>', unsafe_allow_html=True)
+    st.markdown(tarjeta_metrica('metric-empresas', 'Empresas Analizadas', f"{empresas['total_empresas_con_interv']:,}"), unsafe_allow_html=True)
 with col2:
-    st.markdown(f'<div class="metric-card metric-unique"><div class="metric-label">Promedio Intervenciones</div><div class="metric-value">{promedio_interv:.1f}</div></div>', unsafe_allow_html=True)
+    st.markdown(tarjeta_metrica('metric-unique', 'Promedio Intervenciones', f"{empresas['promedio_interv']:.1f}"), unsafe_allow_html=True)
 with col3:
-    st.markdown(f'<div class="metric-card metric-municipio"><div class="metric-label">Mediana Intervenciones</div><div class="metric-value">{mediana_interv:.0f}</div></div>', unsafe_allow_html=True)
+    st.markdown(tarjeta_metrica('metric-municipio', 'Mediana Intervenciones', f"{empresas['mediana_interv']:.0f}"), unsafe_allow_html=True)
 with col4:
-    st.markdown(f'<div class="metric-card metric-horas"><div class="metric-label">Máximo Intervenciones</div><div class="metric-value">{max_interv}</div></div>', unsafe_allow_html=True)
+    st.markdown(tarjeta_metrica('metric-horas', 'Máximo Intervenciones', empresas['max_interv']), unsafe_allow_html=True)
 
 st.markdown("<br>", unsafe_allow_html=True)
 
@@ -350,106 +349,22 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("📊 Top 15 Empresas con Más Intervenciones")
-    
-    # Obtener top 15 por empresa_id
-    top_15_ids = intervenciones_por_empresa_id.head(15)
-    # Mapear a nombres para mostrar
-    top_15_nombres = top_15_ids.index.map(lambda x: str(empresa_id_to_nombre.get(x, x))[:50])
-    top_15_valores = top_15_ids.values
-    
-    # Ordenar de menor a mayor para gráfica horizontal
-    orden = np.argsort(top_15_valores)
-    top_15_nombres_ordenado = top_15_nombres[orden]
-    top_15_valores_ordenado = top_15_valores[orden]
-    
-    fig = go.Figure(go.Bar(
-        y=top_15_nombres_ordenado,
-        x=top_15_valores_ordenado,
-        orientation='h',
-        marker=dict(
-            color=top_15_valores_ordenado,
-            colorscale='Teal',
-            showscale=False
-        ),
-        text=top_15_valores_ordenado,
-        texttemplate='%{text}',
-        textposition='outside',
-        hovertemplate='<b>%{y}</b><br>Intervenciones: %{x}<extra></extra>'
-    ))
-    
-    fig.update_layout(
-        height=500,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="Poppins"),
-        xaxis=dict(title="Número de Intervenciones", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-        yaxis=dict(title="", tickfont=dict(size=10)),
-        margin=dict(t=20,b=20,l=200,r=80)
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras['top_empresas'], use_container_width=True)
 
 with col2:
     st.subheader("📈 Distribución de Intervenciones por Empresa")
-    
-    # Crear rangos de distribución usando empresa_id
-    bins = [1, 2, 5, 10, 20, 50, float('inf')]
-    labels = ['1 intervención', '2-4 intervenciones', '5-9 intervenciones', '10-19 intervenciones', '20-49 intervenciones', '50+ intervenciones']
-    rangos = pd.cut(intervenciones_por_empresa_id, bins=bins, labels=labels, right=False)
-    distribucion = rangos.value_counts().sort_index()
-    
-    fig = go.Figure(data=[
-        go.Bar(
-            x=distribucion.index,
-            y=distribucion.values,
-            marker=dict(
-                color=['#667eea', '#764ba2', '#f093fb', '#4facfe', '#43e97b', '#fa709a']
-            ),
-            text=distribucion.values,
-            texttemplate='%{text:,}<br>empresas',
-            textposition='outside',
-            hovertemplate='<b>%{x}</b><br>Empresas: %{y:,}<extra></extra>'
-        )
-    ])
-    
-    fig.update_layout(
-        height=500,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(family="Poppins"),
-        xaxis=dict(title="", tickangle=-45),
-        yaxis=dict(title="Número de Empresas", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-        showlegend=False,
-        margin=dict(t=20,b=100,l=20,r=20)
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras['distribucion_empresas'], use_container_width=True)
 
 # Información adicional en cards
 col1, col2, col3 = st.columns(3)
 
-empresas_1_interv = (intervenciones_por_empresa_id == 1).sum()
-pct_1_interv = (empresas_1_interv / total_empresas_con_interv * 100)
-
-empresas_10_mas = (intervenciones_por_empresa_id >= 10).sum()
-pct_10_mas = (empresas_10_mas / total_empresas_con_interv * 100)
-
-empresas_recurrentes = (intervenciones_por_empresa_id >= 5).sum()
-pct_recurrentes = (empresas_recurrentes / total_empresas_con_interv * 100)
-
-empresas_10_mas = (intervenciones_por_empresa_id >= 10).sum()
-pct_10_mas = (empresas_10_mas / total_empresas_con_interv * 100)
-
-empresas_recurrentes = (intervenciones_por_empresa_id >= 5).sum()
-pct_recurrentes = (empresas_recurrentes / total_empresas_con_interv * 100)
-
 with col1:
     st.markdown(f"""
     <div style='background:#fff3cd; padding:15px; border-radius:10px; border-left:5px solid #ffc107; margin-top:10px;'>
         <p style='margin:0; font-size:0.9em; color:#856404;'>
             <b>📌 Empresas con 1 intervención:</b><br>
-            <span style='font-size:1.5em; font-weight:700; color:#d39e00;'>{empresas_1_interv:,}</span> 
-            <span style='font-size:0.85em;'>({pct_1_interv:.1f}%)</span>
+            <span style='font-size:1.5em; font-weight:700; color:#d39e00;'>{empresas['empresas_1_interv']:,}</span> 
+            <span style='font-size:0.85em;'>({empresas['pct_1_interv']:.1f}%)</span>
         </p>
     </div>
     """, unsafe_allow_html=True)
@@ -459,8 +374,8 @@ with col2:
     <div style='background:#d1ecf1; padding:15px; border-radius:10px; border-left:5px solid #17a2b8; margin-top:10px;'>
         <p style='margin:0; font-size:0.9em; color:#0c5460;'>
             <b>🔄 Empresas recurrentes (5+):</b><br>
-            <span style='font-size:1.5em; font-weight:700; color:#117a8b;'>{empresas_recurrentes:,}</span> 
-            <span style='font-size:0.85em;'>({pct_recurrentes:.1f}%)</span>
+            <span style='font-size:1.5em; font-weight:700; color:#117a8b;'>{empresas['empresas_recurrentes']:,}</span> 
+            <span style='font-size:0.85em;'>({empresas['pct_recurrentes']:.1f}%)</span>
         </p>
     </div>
     """, unsafe_allow_html=True)
@@ -470,8 +385,8 @@ with col3:
     <div style='background:#d4edda; padding:15px; border-radius:10px; border-left:5px solid #28a745; margin-top:10px;'>
         <p style='margin:0; font-size:0.9em; color:#155724;'>
             <b>⭐ Empresas altamente activas (10+):</b><br>
-            <span style='font-size:1.5em; font-weight:700; color:#28a745;'>{empresas_10_mas:,}</span> 
-            <span style='font-size:0.85em;'>({pct_10_mas:.1f}%)</span>
+            <span style='font-size:1.5em; font-weight:700; color:#28a745;'>{empresas['empresas_10_mas']:,}</span> 
+            <span style='font-size:0.85em;'>({empresas['pct_10_mas']:.1f}%)</span>
         </p>
     </div>
     """, unsafe_allow_html=True)
@@ -485,49 +400,25 @@ st.markdown("---")
 # ============================================================================
 st.header("💯 Indicadores de Resultado e Impacto")
 
+indicadores = vista['indicadores']
+
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("😊 Satisfacción del Cliente")
-    sat_data = df_filtrado['Indicador_satisfacción'].dropna()
-    if len(sat_data) > 0:
-        prom = sat_data.mean()
-        emp = len(sat_data)
-        emp_sat = (sat_data >= 75).sum()
-        pct_sat = (emp_sat / emp * 100) if emp > 0 else 0
-        
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number+delta", value=prom, domain={'x': [0, 1], 'y': [0, 1]},
-            title={'text': "Promedio", 'font': {'size': 24}},
-            delta={'reference': 75, 'suffix': '%'},
-            gauge={'axis': {'range': [0,100], 'ticksuffix': '%'}, 'bar': {'color': "#667eea"},
-                   'steps': [{'range': [0,50], 'color': "#fee2e2"}, {'range': [50,75], 'color': "#fef3c7"}, {'range': [75,100], 'color': "#d1fae5"}],
-                   'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': 75}}))
-        fig.update_layout(height=350, margin=dict(t=60,b=20,l=20,r=20), paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Poppins"))
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown(f'<p style="text-align:center; background:#f9f9f9; padding:10px; border-radius:8px; font-size:0.95em;">📊 <b>{emp} empresas</b> evaluadas | ✅ <b>{pct_sat:.1f}%</b> altamente satisfechas (≥75%)</p>', unsafe_allow_html=True)
+    if figuras['satisfaccion'] is not None:
+        sat = indicadores['satisfaccion']
+        st.plotly_chart(figuras['satisfaccion'], use_container_width=True)
+        st.markdown(f'<p style="text-align:center; background:#f9f9f9; padding:10px; border-radius:8px; font-size:0.95em;">📊 <b>{sat["emp"]} empresas</b> evaluadas | ✅ <b>{sat["pct_sat"]:.1f}%</b> altamente satisfechas (≥75%)</p>', unsafe_allow_html=True)
     else:
         st.info("No hay datos disponibles")
 
 with col2:
     st.subheader("💰 Impacto en Ventas")
-    vent_data = df_filtrado['Indicador_ventas'].dropna()
-    if len(vent_data) > 0:
-        mej = (vent_data > 0).sum()
-        sin_c = (vent_data == 0).sum()
-        dis = (vent_data < 0).sum()
-        pct_mej = (vent_data[vent_data > 0].mean() * 100) if mej > 0 else 0
-        
-        # SOLO MOSTRAR MEJORARON Y SIN CAMBIO
-        fig = go.Figure(go.Bar(x=['Mejoraron', 'Sin cambio'], y=[mej, sin_c],
-                               text=[mej, sin_c], texttemplate='%{text}', textposition='outside',
-                               marker=dict(color=['#10b981','#fbbf24']),
-                               hovertemplate='%{x}: %{y} empresas<extra></extra>'))
-        fig.update_layout(height=350, margin=dict(t=20,b=20,l=20,r=20), plot_bgcolor='rgba(0,0,0,0)',
-                         paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Poppins"),
-                         yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)', title="Empresas"), showlegend=False)
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown(f'<p style="text-align:center; background:#f9f9f9; padding:10px; border-radius:8px; font-size:0.95em;">📊 <b>{len(vent_data)} empresas</b> medidas | 📈 <b>{mej} mejoraron</b> (promedio +{pct_mej:.1f}%) | ➡️ <b>{sin_c} sin cambio</b></p>', unsafe_allow_html=True)
+    if figuras['ventas'] is not None:
+        vent = indicadores['ventas']
+        st.plotly_chart(figuras['ventas'], use_container_width=True)
+        st.markdown(f'<p style="text-align:center; background:#f9f9f9; padding:10px; border-radius:8px; font-size:0.95em;">📊 <b>{vent["medidas"]} empresas</b> medidas | 📈 <b>{vent["mej"]} mejoraron</b> (promedio +{vent["pct_mej"]:.1f}%) | ➡️ <b>{vent["sin_c"]} sin cambio</b></p>', unsafe_allow_html=True)
     else:
         st.info("No hay datos disponibles")
 
@@ -535,41 +426,17 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("🔧 Procesos Tecnológicos")
-    proc_data = df_filtrado['Indicador_procesos_tecnologicos'].dropna()
-    if len(proc_data) > 0:
-        if proc_data.max() <= 1:
-            proc_data = proc_data * 100
-        prom_proc = proc_data.mean()
-        emp_proc = len(proc_data)
-        
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number", value=prom_proc, domain={'x': [0, 1], 'y': [0, 1]},
-            title={'text': "Adopción", 'font': {'size': 24}}, number={'suffix': '%'},
-            gauge={'axis': {'range': [0,100], 'ticksuffix': '%'}, 'bar': {'color': "#43e97b"},
-                   'steps': [{'range': [0,30], 'color': "#fee2e2"}, {'range': [30,60], 'color': "#fef3c7"}, {'range': [60,100], 'color': "#d1fae5"}]}))
-        fig.update_layout(height=350, margin=dict(t=60,b=20,l=20,r=20), paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Poppins"))
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown(f'<p style="text-align:center; background:#f9f9f9; padding:10px; border-radius:8px; font-size:0.95em;">De 100 empresas se evaluaron <b>{emp_proc}</b> - Zasca Tecnología</p>', unsafe_allow_html=True)
+    if figuras['procesos'] is not None:
+        st.plotly_chart(figuras['procesos'], use_container_width=True)
+        st.markdown(f'<p style="text-align:center; background:#f9f9f9; padding:10px; border-radius:8px; font-size:0.95em;">De 100 empresas se evaluaron <b>{indicadores["procesos"]["emp"]}</b> - Zasca Tecnología</p>', unsafe_allow_html=True)
     else:
         st.info("No hay datos disponibles")
 
 with col2:
     st.subheader("🌐 Presencia Digital")
-    pres_data = df_filtrado['Indicador_presencia_en_linea'].dropna()
-    if len(pres_data) > 0:
-        if pres_data.max() <= 1:
-            pres_data = pres_data * 100
-        prom_pres = pres_data.mean()
-        emp_pres = len(pres_data)
-        
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number", value=prom_pres, domain={'x': [0, 1], 'y': [0, 1]},
-            title={'text': "Nivel", 'font': {'size': 24}}, number={'suffix': '%'},
-            gauge={'axis': {'range': [0,100], 'ticksuffix': '%'}, 'bar': {'color': "#4facfe"},
-                   'steps': [{'range': [0,30], 'color': "#fee2e2"}, {'range': [30,60], 'color': "#fef3c7"}, {'range': [60,100], 'color': "#d1fae5"}]}))
-        fig.update_layout(height=350, margin=dict(t=60,b=20,l=20,r=20), paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Poppins"))
-        st.plotly_chart(fig, use_container_width=True)
-        st.markdown(f'<p style="text-align:center; background:#f9f9f9; padding:10px; border-radius:8px; font-size:0.95em;">De 635 empresas se evaluaron <b>{emp_pres}</b> - Zasca Tecnología</p>', unsafe_allow_html=True)
+    if figuras['presencia'] is not None:
+        st.plotly_chart(figuras['presencia'], use_container_width=True)
+        st.markdown(f'<p style="text-align:center; background:#f9f9f9; padding:10px; border-radius:8px; font-size:0.95em;">De 635 empresas se evaluaron <b>{indicadores["presencia"]["emp"]}</b> - Zasca Tecnología</p>', unsafe_allow_html=True)
     else:
         st.info("No hay datos disponibles")
 
@@ -584,74 +451,35 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("📊 Evolución por Año (Programas)")
-    evol = df_filtrado.groupby('Año_Ejecución').size().reset_index()
-    evol.columns = ['Año', 'Intervenciones']
-    evol = evol.sort_values('Año')
-    
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=evol['Año'], y=evol['Intervenciones'], mode='lines+markers',
-                             line=dict(color='#667eea', width=3), marker=dict(size=12, color='#667eea', line=dict(color='white', width=2)),
-                             fill='tozeroy', fillcolor='rgba(102,126,234,0.1)',
-                             text=evol['Intervenciones'], textposition='top center', texttemplate='%{text:,}',
-                             hovertemplate='<b>Año %{x}</b><br>Intervenciones: %{y:,}<extra></extra>'))
-    fig.update_layout(height=450, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Poppins"),
-                     xaxis=dict(title="Año", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-                     yaxis=dict(title="Número de Intervenciones", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-                     hovermode='x unified', showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras['evolucion_anual'], use_container_width=True)
 
 with col2:
     st.subheader("🎯 Promedio de Horas por Tema")
-    horas_prom = df_filtrado.groupby('Tema')['No_horas_de_consultoría'].mean().sort_values(ascending=True)
-    
-    fig = go.Figure(go.Bar(y=horas_prom.index, x=horas_prom.values, orientation='h',
-                           marker_color='#4facfe', text=horas_prom.values.round(1), texttemplate='%{text}', textposition='outside',
-                           hovertemplate='<b>%{y}</b><br>Promedio: %{x:.1f} horas<extra></extra>'))
-    fig.update_layout(height=450, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Poppins"),
-                     xaxis=dict(title="Promedio de Horas", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-                     yaxis=dict(title=""), showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras['horas_promedio_tema'], use_container_width=True)
 
 st.subheader("💧 Matriz de Intervenciones: Sector x Género")
-
-matriz_data = df_filtrado[(df_filtrado['Sector'].notna()) & (df_filtrado['Sector'] != 'NAN')].groupby(['Sector', 'Género']).size().unstack(fill_value=0)
-
-fig = go.Figure(data=go.Heatmap(
-    z=matriz_data.values, x=matriz_data.columns, y=matriz_data.index, colorscale='Blues',
-    text=matriz_data.values, texttemplate='%{text}', textfont={"size": 12},
-    hovertemplate='<b>Sector:</b> %{y}<br><b>Género:</b> %{x}<br><b>Intervenciones:</b> %{z}<extra></extra>',
-    colorbar=dict(title="Intervenciones")))
-
-fig.update_layout(height=600, xaxis_title="Género", yaxis_title="Sector",
-                 font=dict(family="Poppins", size=12), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-
-st.plotly_chart(fig, use_container_width=True)
+st.plotly_chart(figuras['matriz_sector_genero'], use_container_width=True)
 
 st.markdown("---")
 
 # ============================================================================
 # ANÁLISIS DE TALLERES
 # ============================================================================
-if df_talleres is not None:
+if 'talleres' in vista:
+    talleres = vista['talleres']
     st.header("🎓 Análisis de Talleres")
     
-    # Calcular métricas principales
-    total_horas_talleres = df_talleres['Horas'].sum()
-    total_participantes_talleres = df_talleres['Participantes'].sum()
-    total_talleres_realizados = len(df_talleres)
-    promedio_participantes_taller = df_talleres['Participantes'].mean()
-    
     # MÉTRICAS PRINCIPALES
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.markdown(f'<div class="metric-card metric-empresas"><div class="metric-label">Total Talleres</div><div class="metric-value">{total_talleres_realizados}</div></div>', unsafe_allow_html=True)
+        st.markdown(tarjeta_metrica('metric-empresas', 'Total Talleres', talleres['total_talleres_realizados']), unsafe_allow_html=True)
     with col2:
-        st.markdown(f'<div class="metric-card metric-horas"><div class="metric-label">Horas de Formación</div><div class="metric-value">{total_horas_talleres}</div></div>', unsafe_allow_html=True)
+        st.markdown(tarjeta_metrica('metric-horas', 'Horas de Formación', talleres['total_horas_talleres']), unsafe_allow_html=True)
     with col3:
-        st.markdown(f'<div class="metric-card metric-municipio"><div class="metric-label">Total Participantes</div><div class="metric-value">{total_participantes_talleres:,}</div></div>', unsafe_allow_html=True)
+        st.markdown(tarjeta_metrica('metric-municipio', 'Total Participantes', f"{talleres['total_participantes_talleres']:,}"), unsafe_allow_html=True)
     with col4:
-        st.markdown(f'<div class="metric-card metric-unique"><div class="metric-label">Promedio por Taller</div><div class="metric-value">{promedio_participantes_taller:.0f}</div></div>', unsafe_allow_html=True)
+        st.markdown(tarjeta_metrica('metric-unique', 'Promedio por Taller', f"{talleres['promedio_participantes_taller']:.0f}"), unsafe_allow_html=True)
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -660,97 +488,33 @@ if df_talleres is not None:
     
     with col1:
         st.subheader("📊 Participantes por Tema")
-        
-        # Agrupar por tema
-        participantes_tema = df_talleres.groupby('Tema')['Participantes'].sum().sort_values(ascending=False)
-        
-        fig = go.Figure(data=[
-            go.Bar(
-                x=participantes_tema.values,
-                y=participantes_tema.index,
-                orientation='h',
-                marker=dict(
-                    color=participantes_tema.values,
-                    colorscale='Teal',
-                    showscale=False
-                ),
-                text=participantes_tema.values,
-                texttemplate='%{text:,}',
-                textposition='outside',
-                hovertemplate='<b>%{y}</b><br>Participantes: %{x:,}<extra></extra>'
-            )
-        ])
-        
-        fig.update_layout(
-            height=400,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Poppins"),
-            xaxis=dict(title="Número de Participantes", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-            yaxis=dict(title=""),
-            margin=dict(t=20,b=20,l=20,r=80)
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figuras['talleres_tema'], use_container_width=True)
     
     with col2:
-        st.subheader("📅 Evolución Mensual de Participantes")
-        
-        # Procesar fechas para análisis mensual - Método simplificado
-        df_talleres_temp = df_talleres.copy()
-        
-        # Intentar convertir fechas de manera automática
-        df_talleres_temp['Fecha_dt'] = pd.to_datetime(df_talleres_temp['Fecha '], errors='coerce')
-        
-        # Crear mes-año para agrupar
-        df_talleres_temp['Mes_Año'] = df_talleres_temp['Fecha_dt'].dt.strftime('%Y-%m')
-        
-        # Filtrar solo registros con fecha válida
-        df_talleres_validos = df_talleres_temp[df_talleres_temp['Fecha_dt'].notna()].copy()
-        
-        if len(df_talleres_validos) > 0:
-            participantes_mes = df_talleres_validos.groupby('Mes_Año')['Participantes'].sum().sort_index()
-            
-            fig = go.Figure()
-            
-            fig.add_trace(go.Scatter(
-                x=participantes_mes.index,
-                y=participantes_mes.values,
-                mode='lines+markers',
-                line=dict(color='#667eea', width=3),
-                marker=dict(size=10, color='#667eea', line=dict(color='white', width=2)),
-                fill='tozeroy',
-                fillcolor='rgba(102,126,234,0.2)',
-                text=participantes_mes.values,
-                textposition='top center',
-                texttemplate='%{text}',
-                hovertemplate='<b>%{x}</b><br>Participantes: %{y:,}<extra></extra>'
-            ))
-            
-            fig.update_layout(
-                height=400,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(family="Poppins"),
-                xaxis=dict(title="Mes", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-                yaxis=dict(title="Participantes", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
-                hovermode='x unified',
-                showlegend=False,
-                margin=dict(t=20,b=20,l=20,r=20)
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+        st.subheader("📅 Evolución de Participantes")
+        frecuencia_talleres = FRECUENCIAS[st.radio("Periodo", list(FRECUENCIAS), horizontal=True, label_visibility="collapsed")]
+        if frecuencia_talleres == 'M':
+            fig_evolucion = figuras['talleres_mensual']
+        else:
+            # Trimestral y anual salen directo del acumulado de talleres
+            acumulado_talleres = cargar_catalogo()[0]['talleres'].acumulado
+            fig_evolucion = gestor.obtener('Figuras', 'talleres|' + frecuencia_talleres, lambda: grafica_evolucion_talleres(
+                acumulado_talleres.serie(frecuencia_talleres, 'Participantes'), frecuencia_talleres))
+        if fig_evolucion is not None:
+            st.plotly_chart(fig_evolucion, use_container_width=True)
+            # Con muy pocos periodos no se proyecta
+            if any(traza.name == 'Proyección' for traza in fig_evolucion.data):
+                st.caption("La línea punteada es una proyección por tendencia lineal de los últimos periodos.")
         else:
             st.info("No hay fechas válidas para mostrar la evolución mensual")
     
     # Información adicional
-    taller_max = df_talleres.loc[df_talleres['Participantes'].idxmax()]
-    fecha_taller = taller_max['Fecha '] if isinstance(taller_max['Fecha '], str) else str(taller_max['Fecha '])
+    taller_max = talleres['taller_max']
     st.markdown(f"""
     <div style='background:#f0f9ff; padding:15px; border-radius:10px; border-left:5px solid #4facfe; margin-top:20px;'>
         <p style='margin:0; font-size:0.95em;'>
-            🏆 <b>Taller más concurrido:</b> {taller_max['Tema']} con <b>{taller_max['Participantes']} participantes</b> 
-            ({fecha_taller})
+            🏆 <b>Taller más concurrido:</b> {taller_max['tema']} con <b>{taller_max['participantes']} participantes</b> 
+            ({taller_max['fecha']})
         </p>
     </div>
     """, unsafe_allow_html=True)
@@ -781,11 +545,8 @@ with st.expander("👁️ Ver datos filtrados", expanded=False):
         st.dataframe(df_mostrar, use_container_width=True, height=400)
         
         # Descargar como Excel
-        from io import BytesIO
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df_filtrado.to_excel(writer, index=False, sheet_name='Datos')
-        excel_data = output.getvalue()
+        excel_data = gestor.obtener('Exportaciones', 'datos|' + clave,
+                                    lambda: a_excel(df_filtrado, index=False, sheet_name='Datos'))
         
         st.download_button(
             label="⬇️ Descargar datos filtrados (Excel)",
@@ -798,48 +559,47 @@ with st.expander("👁️ Ver datos filtrados", expanded=False):
         st.markdown("### Top 50 Empresas con Más Intervenciones")
         
         # Crear dataframe de empresas usando empresa_id (el identificador correcto)
-        df_filtrado_temp = df_filtrado.copy()
+        def construir_tabla_empresas():
+            # Contar intervenciones por empresa_id
+            intervenciones_count = df_filtrado.groupby('empresa_id').size().reset_index(name='Intervenciones')
         
-        # Contar intervenciones por empresa_id
-        intervenciones_count = df_filtrado_temp.groupby('empresa_id').size().reset_index(name='Intervenciones')
+            # Obtener información adicional por empresa_id
+            empresa_info = df_filtrado.groupby('empresa_id').agg({
+                'Nombre_de_la_empresa': 'first',
+                'Nombre': 'first',
+                'Municipio': 'first',
+                'Sector': 'first',
+                'Programa': lambda x: ', '.join(x.unique()[:3]),  # Primeros 3 programas
+                'No_horas_de_consultoría': 'sum'
+            }).reset_index()
         
-        # Obtener información adicional por empresa_id
-        empresa_info = df_filtrado_temp.groupby('empresa_id').agg({
-            'Nombre_de_la_empresa': 'first',
-            'Nombre': 'first',
-            'Municipio': 'first',
-            'Sector': 'first',
-            'Programa': lambda x: ', '.join(x.unique()[:3]),  # Primeros 3 programas
-            'No_horas_de_consultoría': 'sum'
-        }).reset_index()
+            # Combinar intervenciones con info
+            tabla_empresas = intervenciones_count.merge(empresa_info, on='empresa_id')
         
-        # Combinar intervenciones con info
-        tabla_empresas = intervenciones_count.merge(empresa_info, on='empresa_id')
+            # Crear columna de nombre usando Nombre_de_la_empresa, si no existe usar Nombre
+            tabla_empresas['Empresa'] = tabla_empresas['Nombre_de_la_empresa'].fillna(tabla_empresas['Nombre'])
         
-        # Crear columna de nombre usando Nombre_de_la_empresa, si no existe usar Nombre
-        tabla_empresas['Empresa'] = tabla_empresas['Nombre_de_la_empresa'].fillna(tabla_empresas['Nombre'])
+            # Ordenar por intervenciones y tomar top 50
+            tabla_empresas = tabla_empresas.sort_values('Intervenciones', ascending=False).head(50)
         
-        # Ordenar por intervenciones y tomar top 50
-        tabla_empresas = tabla_empresas.sort_values('Intervenciones', ascending=False).head(50)
+            # Seleccionar y renombrar columnas para mostrar
+            tabla_empresas = tabla_empresas[['Empresa', 'Intervenciones', 'No_horas_de_consultoría', 'Municipio', 'Sector', 'Programa']]
+            tabla_empresas = tabla_empresas.rename(columns={
+                'No_horas_de_consultoría': 'Total Horas',
+                'Programa': 'Programas'
+            })
         
-        # Seleccionar y renombrar columnas para mostrar
-        tabla_empresas = tabla_empresas[['Empresa', 'Intervenciones', 'No_horas_de_consultoría', 'Municipio', 'Sector', 'Programa']]
-        tabla_empresas = tabla_empresas.rename(columns={
-            'No_horas_de_consultoría': 'Total Horas',
-            'Programa': 'Programas'
-        })
+            # Resetear índice para numeración desde 1
+            tabla_empresas.index = range(1, len(tabla_empresas) + 1)
+            return tabla_empresas
         
-        # Resetear índice para numeración desde 1
-        tabla_empresas.index = range(1, len(tabla_empresas) + 1)
+        tabla_empresas = gestor.obtener('Agregados', 'empresas|' + clave, construir_tabla_empresas)
         
         st.dataframe(tabla_empresas, use_container_width=True, height=400)
         
         # Botón de descarga para tabla de empresas en Excel
-        from io import BytesIO
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            tabla_empresas.to_excel(writer, sheet_name='Top Empresas')
-        excel_empresas = output.getvalue()
+        excel_empresas = gestor.obtener('Exportaciones', 'empresas|' + clave,
+                                        lambda: a_excel(tabla_empresas, sheet_name='Top Empresas'))
         
         st.download_button(
             label="⬇️ Descargar Top Empresas (Excel)",
@@ -848,6 +608,42 @@ with st.expander("👁️ Ver datos filtrados", expanded=False):
             mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         )
 
+with st.expander("🧪 Reporte de calidad de datos", expanded=False):
+    reporte_calidad = cargar_reporte_calidad()
+    if len(reporte_calidad) > 0:
+        st.markdown("Verificaciones aplicadas al cargar los archivos. Los valores marcados como "
+                    "*Convertido a vacío* no se incluyen en métricas ni gráficas.")
+        st.dataframe(reporte_calidad, use_container_width=True)
+    else:
+        st.success("✅ Los archivos pasaron todas las verificaciones de calidad")
+
+# ============================================================================
+# CONSULTA AVANZADA (SQL)
+# ============================================================================
+if modo_consulta:
+    st.markdown("---")
+    st.header("🧮 Consulta avanzada")
+    st.markdown("Consultas SQL de solo lectura sobre las tablas `intervenciones` y `talleres`. "
+                "La vista `intervenciones_filtradas` aplica los filtros del panel lateral.")
+    
+    consulta = st.text_area("Consulta SQL", CONSULTA_EJEMPLO, height=180)
+    col1, col2 = st.columns(2)
+    with col1:
+        filas_por_pagina = st.selectbox("Filas por página", [25, 50, 100, 500], index=1)
+    with col2:
+        pagina = st.number_input("Página", min_value=1, value=1, step=1)
+    
+    try:
+        resultado_sql, hay_mas = cargar_motor_consultas().paginar(consulta, filtros, int(pagina), filas_por_pagina)
+    except sqlite3.Error as e:
+        st.error(f"⚠️ Error en la consulta: {e}")
+    else:
+        if len(resultado_sql) > 0:
+            st.markdown(f"**Filas {resultado_sql.index[0]:,} – {resultado_sql.index[-1]:,}**" + (" (hay más páginas)" if hay_mas else ""))
+            st.dataframe(resultado_sql, use_container_width=True, height=400)
+        else:
+            st.info("La consulta no devolvió filas en esta página")
+
 # ============================================================================
 # FOOTER
 # ============================================================================
@@ -861,3 +657,18 @@ st.markdown(f"""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+# ============================================================================
+# PANEL DE ADMINISTRACIÓN
+# ============================================================================
+if st.session_state.get('admin'):
+    with st.sidebar.expander("🛠️ Memoria", expanded=True):
+        total_memoria = gestor.total()
+        st.progress(min(total_memoria / gestor.presupuesto, 1.0),
+                    text=f"{total_memoria / 1024 ** 2:,.1f} MB de {gestor.presupuesto / 1024 ** 2:,.0f} MB")
+        st.markdown(f"**Aciertos:** {gestor.aciertos:,} • **Fallos:** {gestor.fallos:,} • **Descartes:** {gestor.descartes:,}")
+        st.dataframe(gestor.uso(), use_container_width=True, hide_index=True,
+                     column_config={'MB': st.column_config.NumberColumn(format="%.2f")})
+        if st.button("🧹 Vaciar caché"):
+            gestor.vaciar()
+            st.rerun()
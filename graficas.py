@@ -0,0 +1,582 @@
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from calidad_datos import CORREGIMIENTOS_QUINDIO, MUNICIPIOS_QUINDIO
+from series_tiempo import etiquetas_periodo, pronosticar
+
+# ============================================================================
+# CÁLCULO DE MÉTRICAS Y GRÁFICAS
+# ============================================================================
+# Código de gráficas compartido por el dashboard y los reportes programados
+# (reportes.py). construir_vista() devuelve un diccionario con todas las
+# métricas y figuras de una combinación de filtros; el dashboard solo se
+# encarga de ubicarlas en la página.
+
+ESTILOS_CSS = """
+<style>
+    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;600;700&display=swap');
+    .main { background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%); }
+    .metric-card { background: white; padding: 10px; border-radius: 15px; box-shadow: 0 4px 6px rgba(0,0,0,0.07); border-left: 5px solid; margin: 10px 0; transition: transform 0.2s; }
+    .metric-card:hover { transform: translateY(-5px); box-shadow: 0 8px 12px rgba(0,0,0,0.15); }
+    .metric-value { font-size: 1.5em; font-weight: 700; font-family: 'Poppins', sans-serif; margin: 10px 0; }
+    .metric-label { font-size: 0.60em; color: #666; font-weight: 500; text-transform: uppercase; letter-spacing: 1px; }
+    .metric-empresas { border-color: #667eea; } .metric-empresas .metric-value { color: #667eea; }
+    .metric-municipio { border-color: #f093fb; } .metric-municipio .metric-value { color: #f093fb; }
+    .metric-sector { border-color: #4facfe; } .metric-sector .metric-value { color: #4facfe; }
+    .metric-horas { border-color: #43e97b; } .metric-horas .metric-value { color: #43e97b; }
+    .metric-unique { border-color: #fa709a; } .metric-unique .metric-value { color: #fa709a; }
+    h1, h2, h3 { font-family: 'Poppins', sans-serif; color: #2d3748; font-weight: 600; }
+    .stMultiSelect label { font-weight: 600; color: #2d3748; }
+</style>
+"""
+
+
+def tarjeta_metrica(clase, etiqueta, valor):
+    return f'<div class="metric-card {clase}"><div class="metric-label">{etiqueta}</div><div class="metric-value">{valor}</div></div>'
+
+
+def _pie_porcentaje(data, colores, etiqueta_valor, formato_valor, total=None):
+    pct = (data / (data.sum() if total is None else total) * 100).round(1)
+    fig = go.Figure(go.Pie(labels=data.index, values=pct, customdata=data.values,
+                           hovertemplate=f'<b>%{{label}}</b><br>Porcentaje: %{{value:.1f}}%<br>{etiqueta_valor}: %{{customdata:{formato_valor}}}<extra></extra>',
+                           textinfo='percent', marker=dict(colors=colores, line=dict(color='white', width=2))))
+    fig.update_layout(height=500, showlegend=True, font=dict(family="Poppins"), paper_bgcolor='rgba(0,0,0,0)', margin=dict(t=20,b=20,l=20,r=20))
+    return fig
+
+
+def _barras_empresas(serie, colorscale):
+    fig = go.Figure(go.Bar(
+        y=serie.index,
+        x=serie.values,
+        orientation='h',
+        marker=dict(
+            color=serie.values,
+            colorscale=colorscale,
+            showscale=True,
+            colorbar=dict(title="Empresas")
+        ),
+        text=serie.values,
+        texttemplate='%{text:,}',
+        textposition='outside',
+        hovertemplate='<b>%{y}</b><br>Empresas únicas: %{x:,}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        height=500,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Poppins"),
+        xaxis=dict(title="Número de Empresas", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+        yaxis=dict(title=""),
+        margin=dict(t=20,b=20,l=20,r=20)
+    )
+    return fig
+
+
+def _gauge(valor, titulo, color, pasos, modo, umbral=None, **kwargs):
+    gauge = {'axis': {'range': [0,100], 'ticksuffix': '%'}, 'bar': {'color': color}, 'steps': pasos}
+    if umbral is not None:
+        gauge['threshold'] = {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': umbral}
+    fig = go.Figure(go.Indicator(
+        mode=modo, value=valor, domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': titulo, 'font': {'size': 24}}, gauge=gauge, **kwargs))
+    fig.update_layout(height=350, margin=dict(t=60,b=20,l=20,r=20), paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Poppins"))
+    return fig
+
+
+# Periodos que se proyectan en las gráficas de evolución
+PERIODOS_PRONOSTICO = {'M': 3, 'Q': 2, 'Y': 2}
+
+
+def _eje_periodo(indice, frecuencia):
+    # Los años se grafican como número; meses y trimestres como etiqueta
+    return indice.year if frecuencia == 'Y' else etiquetas_periodo(indice, frecuencia)
+
+
+def _traza_proyeccion(serie, frecuencia, color, etiqueta):
+    # Línea punteada desde el último dato real hasta los periodos proyectados
+    proyeccion = pronosticar(serie, frecuencia, PERIODOS_PRONOSTICO[frecuencia])
+    if proyeccion is None:
+        return None
+    x = _eje_periodo(serie.index[-1:].append(proyeccion.index), frecuencia)
+    y = np.concatenate([serie.to_numpy(dtype=float)[-1:], proyeccion.to_numpy().round()])
+    return go.Scatter(x=x, y=y, mode='lines+markers', name='Proyección',
+                      line=dict(color=color, width=2, dash='dash'), marker=dict(size=8, color=color, symbol='circle-open'),
+                      customdata=['Último dato'] + ['Proyección'] * len(proyeccion),
+                      hovertemplate=f'<b>%{{x}}</b><br>{etiqueta} (%{{customdata}}): %{{y:,.0f}}<extra></extra>')
+
+
+# ============================================================================
+# MÉTRICAS PRINCIPALES
+# ============================================================================
+def calcular_metricas(df_filtrado):
+    return {
+        'total_intervenciones': len(df_filtrado),
+        'empresas_unicas': df_filtrado['empresa_id'].nunique(),
+        # Separar Municipios (12) y Corregimientos
+        'municipios_count': df_filtrado.loc[~df_filtrado['Municipio'].isin(CORREGIMIENTOS_QUINDIO), 'Municipio'].nunique(),
+        'corregimientos_count': df_filtrado.loc[df_filtrado['Municipio'].isin(CORREGIMIENTOS_QUINDIO), 'Municipio'].nunique(),
+        'sectores_atendidos': df_filtrado['Sector'].nunique(),
+        'total_horas': df_filtrado['No_horas_de_consultoría'].sum(),
+    }
+
+
+# ============================================================================
+# MAPA POR MUNICIPIO
+# ============================================================================
+def grafica_mapa(agregados, ubicaciones, medida, colorscale='Purples'):
+    # Burbujas en la ubicación aproximada de cada cabecera (sin límites
+    # municipales) sobre ejes cartesianos: no hace falta descargar mapas base,
+    # así el mapa funciona sin red
+    municipios = ubicaciones['municipios'].join(agregados.reindex(MUNICIPIOS_QUINDIO, fill_value=0), how='inner')
+    maximo = max(municipios[medida].max(), 1)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=municipios['lon'], y=municipios['lat'],
+        mode='markers+text', name='Municipios',
+        text=municipios.index, textposition='top center', textfont=dict(size=10, color='#2d3748'),
+        marker=dict(size=10 + 34 * np.sqrt(municipios[medida] / maximo),
+                    color=municipios[medida], colorscale=colorscale, cmin=0, cmax=maximo,
+                    showscale=True, colorbar=dict(title=medida, thickness=15),
+                    line=dict(color='white', width=1.5), opacity=0.85),
+        customdata=municipios[['Intervenciones', 'Empresas', 'Horas']].values,
+        hovertemplate=('<b>%{text}</b><br>Intervenciones: %{customdata[0]:,}'
+                       '<br>Empresas únicas: %{customdata[1]:,}<br>Horas: %{customdata[2]:,.0f}<extra></extra>')
+    ))
+
+    corregimientos = ubicaciones['corregimientos'].join(agregados, on='corregimiento').fillna({c: 0 for c in agregados.columns})
+    fig.add_trace(go.Scatter(
+        x=corregimientos['lon'], y=corregimientos['lat'],
+        mode='markers', name='Corregimientos',
+        marker=dict(size=6 + 22 * np.sqrt(corregimientos[medida] / maximo), color='#f5576c',
+                    line=dict(color='white', width=1.5)),
+        customdata=corregimientos[['corregimiento', 'municipio', 'Intervenciones', 'Empresas', 'Horas']].values,
+        hovertemplate=('<b>%{customdata[0]}</b> (%{customdata[1]})<br>Intervenciones: %{customdata[2]:,}'
+                       '<br>Empresas únicas: %{customdata[3]:,}<br>Horas: %{customdata[4]:,.0f}<extra></extra>')
+    ))
+
+    fig.update_layout(
+        height=600,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Poppins"),
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False, scaleanchor='x', scaleratio=1),
+        legend=dict(orientation='h', y=-0.02),
+        margin=dict(t=20,b=20,l=20,r=20)
+    )
+    return fig
+
+
+# ============================================================================
+# RESULTADOS - GRÁFICAS
+# ============================================================================
+def _graficas_resultados(df_filtrado):
+    figuras = {}
+
+    figuras['tema'] = _pie_porcentaje(df_filtrado['Tema'].value_counts(), px.colors.qualitative.Set3, 'Intervenciones', ',')
+
+    genero_data = df_filtrado['Género'].value_counts().reset_index()
+    genero_data.columns = ['Género', 'Cantidad']
+    colores_genero = {'FEMENINO': '#f093fb', 'MASCULINO': '#4facfe', 'NO APLICA': '#a8edea'}
+    fig = px.pie(genero_data, values='Cantidad', names='Género', hole=0.4, color='Género', color_discrete_map=colores_genero)
+    fig.update_layout(height=500, font=dict(family="Poppins"), paper_bgcolor='rgba(0,0,0,0)', showlegend=True)
+    fig.update_traces(textposition='inside', textinfo='percent+label', textfont_size=12)
+    figuras['genero'] = fig
+
+    horas_por_tema = df_filtrado.groupby('Tema')['No_horas_de_consultoría'].sum()
+    figuras['horas_tema'] = _pie_porcentaje(horas_por_tema, px.colors.qualitative.Pastel, 'Horas', ',.0f')
+
+    figuras['municipio'] = _pie_porcentaje(df_filtrado['Municipio'].value_counts(), px.colors.qualitative.Bold, 'Intervenciones', ',')
+
+    sectores = df_filtrado['Sector'].value_counts()
+    sector_data = sectores.head(10)
+    if len(sector_data) > 0:
+        # El porcentaje del Top 10 se calcula sobre el total de sectores
+        figuras['sector'] = _pie_porcentaje(sector_data, px.colors.qualitative.Vivid, 'Intervenciones', ',', total=sectores.sum())
+    else:
+        figuras['sector'] = None
+
+    figuras['programa'] = _pie_porcentaje(df_filtrado['Programa'].value_counts(), px.colors.qualitative.Safe, 'Intervenciones', ',')
+
+    return figuras
+
+
+# ============================================================================
+# ANÁLISIS DE EMPRESAS E INTERVENCIONES POR EMPRESA
+# ============================================================================
+def _graficas_empresas(df_filtrado):
+    figuras = {}
+
+    empresas_municipio = df_filtrado.groupby('Municipio')['empresa_id'].nunique().sort_values(ascending=True)
+    figuras['empresas_municipio'] = _barras_empresas(empresas_municipio, 'Viridis')
+
+    empresas_sector = df_filtrado.groupby('Sector')['empresa_id'].nunique().sort_values(ascending=True)
+    figuras['empresas_sector'] = _barras_empresas(empresas_sector, 'Blues')
+
+    # Contar intervenciones por empresa_id (el identificador único correcto)
+    intervenciones_por_empresa_id = df_filtrado.groupby('empresa_id').size().sort_values(ascending=False)
+
+    # Para mostrar nombres en las gráficas, crear diccionario empresa_id -> nombre
+    empresa_nombre = df_filtrado['Nombre_de_la_empresa'].fillna(df_filtrado['Nombre'])
+    empresa_id_to_nombre = empresa_nombre.groupby(df_filtrado['empresa_id']).first()
+
+    total_empresas_con_interv = len(intervenciones_por_empresa_id)
+    resumen = {
+        'total_empresas_con_interv': total_empresas_con_interv,
+        'promedio_interv': intervenciones_por_empresa_id.mean(),
+        'mediana_interv': intervenciones_por_empresa_id.median(),
+        'max_interv': intervenciones_por_empresa_id.max(),
+        'empresas_1_interv': (intervenciones_por_empresa_id == 1).sum(),
+        'empresas_recurrentes': (intervenciones_por_empresa_id >= 5).sum(),
+        'empresas_10_mas': (intervenciones_por_empresa_id >= 10).sum(),
+    }
+    resumen['pct_1_interv'] = resumen['empresas_1_interv'] / total_empresas_con_interv * 100
+    resumen['pct_recurrentes'] = resumen['empresas_recurrentes'] / total_empresas_con_interv * 100
+    resumen['pct_10_mas'] = resumen['empresas_10_mas'] / total_empresas_con_interv * 100
+
+    # Top 15 por empresa_id, mapeado a nombres para mostrar
+    top_15_ids = intervenciones_por_empresa_id.head(15)
+    top_15_nombres = top_15_ids.index.map(lambda x: str(empresa_id_to_nombre.get(x, x))[:50])
+    top_15_valores = top_15_ids.values
+
+    # Ordenar de menor a mayor para gráfica horizontal
+    orden = np.argsort(top_15_valores)
+    top_15_nombres_ordenado = top_15_nombres[orden]
+    top_15_valores_ordenado = top_15_valores[orden]
+
+    fig = go.Figure(go.Bar(
+        y=top_15_nombres_ordenado,
+        x=top_15_valores_ordenado,
+        orientation='h',
+        marker=dict(
+            color=top_15_valores_ordenado,
+            colorscale='Teal',
+            showscale=False
+        ),
+        text=top_15_valores_ordenado,
+        texttemplate='%{text}',
+        textposition='outside',
+        hovertemplate='<b>%{y}</b><br>Intervenciones: %{x}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        height=500,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Poppins"),
+        xaxis=dict(title="Número de Intervenciones", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+        yaxis=dict(title="", tickfont=dict(size=10)),
+        margin=dict(t=20,b=20,l=200,r=80)
+    )
+    figuras['top_empresas'] = fig
+
+    # Crear rangos de distribución usando empresa_id
+    bins = [1, 2, 5, 10, 20, 50, float('inf')]
+    labels = ['1 intervención', '2-4 intervenciones', '5-9 intervenciones', '10-19 intervenciones', '20-49 intervenciones', '50+ intervenciones']
+    rangos = pd.cut(intervenciones_por_empresa_id, bins=bins, labels=labels, right=False)
+    distribucion = rangos.value_counts().sort_index()
+
+    fig = go.Figure(data=[
+        go.Bar(
+            x=distribucion.index,
+            y=distribucion.values,
+            marker=dict(
+                color=['#667eea', '#764ba2', '#f093fb', '#4facfe', '#43e97b', '#fa709a']
+            ),
+            text=distribucion.values,
+            texttemplate='%{text:,}<br>empresas',
+            textposition='outside',
+            hovertemplate='<b>%{x}</b><br>Empresas: %{y:,}<extra></extra>'
+        )
+    ])
+
+    fig.update_layout(
+        height=500,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Poppins"),
+        xaxis=dict(title="", tickangle=-45),
+        yaxis=dict(title="Número de Empresas", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+        showlegend=False,
+        margin=dict(t=20,b=100,l=20,r=20)
+    )
+    figuras['distribucion_empresas'] = fig
+
+    return figuras, resumen
+
+
+# ============================================================================
+# INDICADORES DE IMPACTO
+# ============================================================================
+def _graficas_indicadores(df_filtrado):
+    figuras = {}
+    resumen = {}
+
+    sat_data = df_filtrado['Indicador_satisfacción'].dropna()
+    if len(sat_data) > 0:
+        emp = len(sat_data)
+        emp_sat = (sat_data >= 75).sum()
+        resumen['satisfaccion'] = {'emp': emp, 'pct_sat': (emp_sat / emp * 100) if emp > 0 else 0}
+        figuras['satisfaccion'] = _gauge(
+            sat_data.mean(), "Promedio", "#667eea",
+            [{'range': [0,50], 'color': "#fee2e2"}, {'range': [50,75], 'color': "#fef3c7"}, {'range': [75,100], 'color': "#d1fae5"}],
+            "gauge+number+delta", umbral=75, delta={'reference': 75, 'suffix': '%'})
+    else:
+        figuras['satisfaccion'] = None
+
+    vent_data = df_filtrado['Indicador_ventas'].dropna()
+    if len(vent_data) > 0:
+        mej = (vent_data > 0).sum()
+        sin_c = (vent_data == 0).sum()
+        resumen['ventas'] = {
+            'medidas': len(vent_data),
+            'mej': mej,
+            'sin_c': sin_c,
+            'pct_mej': (vent_data[vent_data > 0].mean() * 100) if mej > 0 else 0,
+        }
+        # SOLO MOSTRAR MEJORARON Y SIN CAMBIO
+        fig = go.Figure(go.Bar(x=['Mejoraron', 'Sin cambio'], y=[mej, sin_c],
+                               text=[mej, sin_c], texttemplate='%{text}', textposition='outside',
+                               marker=dict(color=['#10b981','#fbbf24']),
+                               hovertemplate='%{x}: %{y} empresas<extra></extra>'))
+        fig.update_layout(height=350, margin=dict(t=20,b=20,l=20,r=20), plot_bgcolor='rgba(0,0,0,0)',
+                         paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Poppins"),
+                         yaxis=dict(showgrid=True, gridcolor='rgba(0,0,0,0.1)', title="Empresas"), showlegend=False)
+        figuras['ventas'] = fig
+    else:
+        figuras['ventas'] = None
+
+    pasos_adopcion = [{'range': [0,30], 'color': "#fee2e2"}, {'range': [30,60], 'color': "#fef3c7"}, {'range': [60,100], 'color': "#d1fae5"}]
+    for clave, columna, titulo, color in [('procesos', 'Indicador_procesos_tecnologicos', "Adopción", "#43e97b"),
+                                          ('presencia', 'Indicador_presencia_en_linea', "Nivel", "#4facfe")]:
+        # Los indicadores ya vienen en escala 0–100 desde la validación de ingesta
+        datos = df_filtrado[columna].dropna()
+        if len(datos) > 0:
+            resumen[clave] = {'emp': len(datos)}
+            figuras[clave] = _gauge(datos.mean(), titulo, color, pasos_adopcion, "gauge+number", number={'suffix': '%'})
+        else:
+            figuras[clave] = None
+
+    return figuras, resumen
+
+
+# ============================================================================
+# ANÁLISIS ADICIONAL DE IMPACTO
+# ============================================================================
+def _serie_anual(df_filtrado, acumulado, filtros):
+    # Del acumulado anual si los filtros lo permiten; si no, de las filas filtradas
+    if acumulado is not None and acumulado.admite(filtros):
+        return acumulado.serie('Y', 'Intervenciones', filtros)
+    conteo = df_filtrado.groupby('Año_Ejecución').size()
+    conteo.index = pd.PeriodIndex([str(int(a)) for a in conteo.index], freq='Y')
+    return conteo
+
+
+def _graficas_impacto(df_filtrado, acumulado=None, filtros=None):
+    figuras = {}
+
+    evol = _serie_anual(df_filtrado, acumulado, filtros or {})
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=_eje_periodo(evol.index, 'Y'), y=evol.values, mode='lines+markers',
+                             line=dict(color='#667eea', width=3), marker=dict(size=12, color='#667eea', line=dict(color='white', width=2)),
+                             fill='tozeroy', fillcolor='rgba(102,126,234,0.1)',
+                             text=evol.values, textposition='top center', texttemplate='%{text:,}',
+                             hovertemplate='<b>Año %{x}</b><br>Intervenciones: %{y:,}<extra></extra>'))
+    # Con el filtro de Año la serie solo tiene los años elegidos: los demás no
+    # son ceros y una tendencia sobre ellos no tiene sentido, así que no se proyecta
+    if 'Año_Ejecución' not in (filtros or {}):
+        proyeccion = _traza_proyeccion(evol, 'Y', '#667eea', 'Intervenciones')
+        if proyeccion is not None:
+            fig.add_trace(proyeccion)
+    fig.update_layout(height=450, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Poppins"),
+                     xaxis=dict(title="Año", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+                     yaxis=dict(title="Número de Intervenciones", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+                     hovermode='x unified', showlegend=False)
+    figuras['evolucion_anual'] = fig
+
+    horas_prom = df_filtrado.groupby('Tema')['No_horas_de_consultoría'].mean().sort_values(ascending=True)
+    fig = go.Figure(go.Bar(y=horas_prom.index, x=horas_prom.values, orientation='h',
+                           marker_color='#4facfe', text=horas_prom.values.round(1), texttemplate='%{text}', textposition='outside',
+                           hovertemplate='<b>%{y}</b><br>Promedio: %{x:.1f} horas<extra></extra>'))
+    fig.update_layout(height=450, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(family="Poppins"),
+                     xaxis=dict(title="Promedio de Horas", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+                     yaxis=dict(title=""), showlegend=False)
+    figuras['horas_promedio_tema'] = fig
+
+    matriz_data = df_filtrado.groupby(['Sector', 'Género']).size().unstack(fill_value=0)
+    fig = go.Figure(data=go.Heatmap(
+        z=matriz_data.values, x=matriz_data.columns, y=matriz_data.index, colorscale='Blues',
+        text=matriz_data.values, texttemplate='%{text}', textfont={"size": 12},
+        hovertemplate='<b>Sector:</b> %{y}<br><b>Género:</b> %{x}<br><b>Intervenciones:</b> %{z}<extra></extra>',
+        colorbar=dict(title="Intervenciones")))
+    fig.update_layout(height=600, xaxis_title="Género", yaxis_title="Sector",
+                     font=dict(family="Poppins", size=12), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+    figuras['matriz_sector_genero'] = fig
+
+    return figuras
+
+
+# ============================================================================
+# ANÁLISIS DE TALLERES
+# ============================================================================
+TITULOS_PERIODO = {'M': "Mes", 'Q': "Trimestre", 'Y': "Año"}
+
+
+def _serie_talleres(df_talleres, acumulado, frecuencia):
+    # Participantes por periodo (solo los periodos con talleres de fecha válida)
+    if acumulado is not None:
+        return acumulado.serie(frecuencia, 'Participantes')
+    validos = df_talleres['Fecha_dt'].notna()
+    return df_talleres.loc[validos, 'Participantes'].groupby(df_talleres.loc[validos, 'Fecha_dt'].dt.to_period(frecuencia)).sum().sort_index()
+
+
+def grafica_evolucion_talleres(serie, frecuencia='M'):
+    if len(serie) == 0:
+        return None
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=_eje_periodo(serie.index, frecuencia),
+        y=serie.values,
+        mode='lines+markers',
+        line=dict(color='#667eea', width=3),
+        marker=dict(size=10, color='#667eea', line=dict(color='white', width=2)),
+        fill='tozeroy',
+        fillcolor='rgba(102,126,234,0.2)',
+        text=serie.values,
+        textposition='top center',
+        texttemplate='%{text}',
+        hovertemplate='<b>%{x}</b><br>Participantes: %{y:,}<extra></extra>'
+    ))
+    proyeccion = _traza_proyeccion(serie, frecuencia, '#667eea', 'Participantes')
+    if proyeccion is not None:
+        fig.add_trace(proyeccion)
+
+    fig.update_layout(
+        height=400,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Poppins"),
+        xaxis=dict(title=TITULOS_PERIODO[frecuencia], showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+        yaxis=dict(title="Participantes", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+        hovermode='x unified',
+        showlegend=False,
+        margin=dict(t=20,b=20,l=20,r=20)
+    )
+    return fig
+
+
+def _graficas_talleres(df_talleres, acumulado=None):
+    figuras = {}
+    resumen = {
+        'total_talleres_realizados': len(df_talleres),
+        'total_horas_talleres': df_talleres['Horas'].sum(),
+        'total_participantes_talleres': df_talleres['Participantes'].sum(),
+        'promedio_participantes_taller': df_talleres['Participantes'].mean(),
+    }
+
+    participantes_tema = df_talleres.groupby('Tema')['Participantes'].sum().sort_values(ascending=False)
+    fig = go.Figure(data=[
+        go.Bar(
+            x=participantes_tema.values,
+            y=participantes_tema.index,
+            orientation='h',
+            marker=dict(
+                color=participantes_tema.values,
+                colorscale='Teal',
+                showscale=False
+            ),
+            text=participantes_tema.values,
+            texttemplate='%{text:,}',
+            textposition='outside',
+            hovertemplate='<b>%{y}</b><br>Participantes: %{x:,}<extra></extra>'
+        )
+    ])
+
+    fig.update_layout(
+        height=400,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Poppins"),
+        xaxis=dict(title="Número de Participantes", showgrid=True, gridcolor='rgba(0,0,0,0.1)'),
+        yaxis=dict(title=""),
+        margin=dict(t=20,b=20,l=20,r=80)
+    )
+    figuras['talleres_tema'] = fig
+
+    figuras['talleres_mensual'] = grafica_evolucion_talleres(_serie_talleres(df_talleres, acumulado, 'M'), 'M')
+
+    taller_max = df_talleres.loc[df_talleres['Participantes'].idxmax()]
+    resumen['taller_max'] = {
+        'tema': taller_max['Tema'],
+        'participantes': taller_max['Participantes'],
+        'fecha': taller_max['Fecha'] if isinstance(taller_max['Fecha'], str) else str(taller_max['Fecha']),
+    }
+
+    return figuras, resumen
+
+
+# ============================================================================
+# VISTA COMPLETA
+# ============================================================================
+def construir_vista(df_filtrado, df_talleres=None, acumulados=None, filtros=None):
+    # acumulados: tipo -> AcumuladoTemporal (opcional); las gráficas de evolución
+    # los usan en lugar de agrupar las filas
+    acumulados = acumulados or {}
+    vista = {'metricas': calcular_metricas(df_filtrado), 'figuras': {}}
+    if vista['metricas']['total_intervenciones'] == 0:
+        return vista
+
+    figuras_empresas, vista['empresas'] = _graficas_empresas(df_filtrado)
+    figuras_indicadores, vista['indicadores'] = _graficas_indicadores(df_filtrado)
+    vista['figuras'].update(_graficas_resultados(df_filtrado))
+    vista['figuras'].update(figuras_empresas)
+    vista['figuras'].update(figuras_indicadores)
+    vista['figuras'].update(_graficas_impacto(df_filtrado, acumulados.get('intervenciones'), filtros))
+
+    if df_talleres is not None:
+        figuras_talleres, vista['talleres'] = _graficas_talleres(df_talleres, acumulados.get('talleres'))
+        vista['figuras'].update(figuras_talleres)
+
+    return vista
+
+
+# ============================================================================
+# SERIALIZACIÓN (instantáneas de reportes)
+# ============================================================================
+def _nativo(valor):
+    if isinstance(valor, dict):
+        return {k: _nativo(v) for k, v in valor.items()}
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+def _figura_a_dict(fig):
+    datos = json.loads(pio.to_json(fig))
+    # Sin la plantilla explícita, al cargarla se usa la predeterminada igual que
+    # una figura recién creada (y Streamlit le aplica su tema)
+    datos['layout'].pop('template', None)
+    return datos
+
+
+def vista_a_json(vista):
+    datos = {k: _nativo(v) for k, v in vista.items() if k != 'figuras'}
+    datos['figuras'] = {k: (_figura_a_dict(fig) if fig is not None else None) for k, fig in vista['figuras'].items()}
+    return json.dumps(datos, ensure_ascii=False)
+
+
+def vista_desde_json(texto):
+    vista = json.loads(texto)
+    # Sin validar: la validación convertiría a texto los arreglos numéricos de
+    # 'text' y cambiaría el formato de las etiquetas respecto a la figura original
+    vista['figuras'] = {k: (go.Figure(fig, _validate=False) if fig is not None else None) for k, fig in vista['figuras'].items()}
+    return vista
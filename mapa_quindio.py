@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from calidad_datos import MUNICIPIOS_QUINDIO
+
+# ============================================================================
+# MAPA DEL QUINDÍO
+# ============================================================================
+# No hay límites municipales oficiales incluidos en el repositorio, así que el
+# mapa no dibuja fronteras: cada municipio es una burbuja en la ubicación
+# aproximada de su cabecera y cada corregimiento un punto. Las ubicaciones
+# vienen de un GeoJSON de puntos incluido en el repositorio (sin red),
+# identificados por la propiedad 'municipio'.
+#
+# Los agregados por municipio se calculan sobre un cubo pre-agregado (una fila
+# por combinación de filtros y empresa) en lugar de las filas originales, así
+# el mapa se recalcula con cada cambio de filtros sin volver a recorrer todos
+# los registros.
+ARCHIVO_UBICACIONES = 'quindio_cabeceras.geojson'
+
+# Columnas del cubo: las de los filtros del dashboard más la empresa, para que
+# el conteo de empresas únicas sea exacto con cualquier combinación de filtros
+COLUMNAS_CUBO = ['Programa', 'Fase', 'Cohorte', 'Año_Ejecución', 'Municipio', 'Sector', 'Género', 'empresa_id']
+
+MEDIDAS_MAPA = {
+    'Intervenciones': 'Intervenciones',
+    'Empresas únicas': 'Empresas',
+    'Horas de consultoría': 'Horas',
+}
+
+
+# ============================================================================
+# UBICACIONES
+# ============================================================================
+def cargar_ubicaciones(ruta=ARCHIVO_UBICACIONES):
+    # Devuelve el punto de la cabecera de cada municipio y los corregimientos
+    # con el municipio al que pertenecen
+    with open(ruta, encoding='utf-8') as f:
+        features = json.load(f)['features']
+
+    municipios = []
+    corregimientos = []
+    for feature in features:
+        if feature['geometry']['type'] != 'Point':
+            raise ValueError(f"'{ruta}' solo admite puntos (cabeceras y corregimientos), no límites")
+        propiedades = feature['properties']
+        lon, lat = feature['geometry']['coordinates'][:2]
+        if propiedades.get('tipo') == 'corregimiento':
+            corregimientos.append({'corregimiento': propiedades['municipio'], 'municipio': propiedades.get('pertenece_a'),
+                                   'lon': lon, 'lat': lat})
+        else:
+            municipios.append({'municipio': propiedades['municipio'], 'lon': lon, 'lat': lat})
+
+    municipios = pd.DataFrame(municipios, columns=['municipio', 'lon', 'lat'])
+    faltantes = set(MUNICIPIOS_QUINDIO) - set(municipios['municipio'])
+    if faltantes:
+        raise ValueError(f"'{ruta}' no tiene la ubicación de: {', '.join(sorted(faltantes))}")
+
+    return {
+        'municipios': municipios.set_index('municipio'),
+        'corregimientos': pd.DataFrame(corregimientos, columns=['corregimiento', 'municipio', 'lon', 'lat']),
+    }
+
+
+# ============================================================================
+# AGREGADOS POR MUNICIPIO
+# ============================================================================
+def precalcular_cubo(df):
+    return (df.groupby(COLUMNAS_CUBO, dropna=False, sort=False)
+              .agg(Intervenciones=('Municipio', 'size'), Horas=('No_horas_de_consultoría', 'sum'))
+              .reset_index())
+
+
+def agregados_municipio(cubo, filtros):
+    # Mismos filtros que filtrar_intervenciones(), aplicados al cubo
+    mascara = np.ones(len(cubo), dtype=bool)
+    for columna, valores in filtros.items():
+        mascara &= cubo[columna].isin(valores).to_numpy()
+    seleccion = cubo[mascara]
+
+    return seleccion.groupby('Municipio').agg(
+        Intervenciones=('Intervenciones', 'sum'),
+        Empresas=('empresa_id', 'nunique'),
+        Horas=('Horas', 'sum'),
+    )
@@ -0,0 +1,158 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# ============================================================================
+# PRESUPUESTO DE MEMORIA
+# ============================================================================
+# Un solo gestor, compartido por todas las sesiones, guarda los resultados
+# derivados de los filtros (vistas, datos filtrados, agregados y exportaciones)
+# y lleva la cuenta de su tamaño. Cuando el total supera el presupuesto se
+# descartan primero las entradas que menos cuesta volver a calcular por byte
+# y que hace más tiempo no se usan (GreedyDual-Size: un LRU que pondera el
+# costo de recálculo y el tamaño).
+#
+# El presupuesto se configura con la variable de entorno DASHBOARD_MEMORIA_MB.
+PRESUPUESTO_PREDETERMINADO_MB = 512
+
+
+def presupuesto_configurado():
+    return int(float(os.environ.get('DASHBOARD_MEMORIA_MB', PRESUPUESTO_PREDETERMINADO_MB)) * 1024 * 1024)
+
+
+def medir_tamaño(valor):
+    # Estimación en bytes de lo que ocupa un resultado en memoria
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    if isinstance(valor, go.Figure):
+        # Los datos de las trazas dominan el tamaño de una figura
+        return sum(medir_tamaño(v) for traza in valor.data for v in traza.to_plotly_json().values()) + 2048
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(medir_tamaño(k) + medir_tamaño(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return sys.getsizeof(valor) + sum(medir_tamaño(v) for v in valor)
+    if hasattr(valor, '__dict__') and not isinstance(valor, type):
+        return sys.getsizeof(valor) + medir_tamaño(vars(valor))
+    return sys.getsizeof(valor)
+
+
+class GestorMemoria:
+    def __init__(self, presupuesto=None):
+        self.presupuesto = presupuesto or presupuesto_configurado()
+        self._entradas = OrderedDict()
+        # Entradas que no se descartan (datos base de todo el dashboard)
+        self._fijas = {}
+        # Cálculos en curso por llave: quien llega después espera el resultado
+        self._en_curso = {}
+        self._nivel = 0.0  # 'L' de GreedyDual-Size: sube con cada descarte
+        self._bloqueo = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.descartes = 0
+
+    def _prioridad(self, entrada):
+        # Segundos de cálculo por MB: lo caro y pequeño se conserva más tiempo
+        return self._nivel + entrada['costo'] / max(entrada['tamaño'] / 1e6, 1e-3)
+
+    def obtener(self, categoria, clave, calcular):
+        llave = (categoria, clave)
+        with self._bloqueo:
+            entrada = self._entradas.get(llave)
+            if entrada is not None:
+                self._entradas.move_to_end(llave)
+                entrada['prioridad'] = self._prioridad(entrada)
+                entrada['usos'] += 1
+                self.aciertos += 1
+                return entrada['valor']
+            futuro = self._en_curso.get(llave)
+            if futuro is None:
+                futuro = self._en_curso[llave] = Future()
+                self.fallos += 1
+                propio = True
+            else:
+                self.aciertos += 1
+                propio = False
+
+        if not propio:
+            # Otra sesión ya lo está calculando (p. ej. el mismo enlace abierto a
+            # la vez). Si ese cálculo falla o se interrumpe, se calcula aquí.
+            try:
+                return futuro.result()
+            except BaseException:
+                return self.obtener(categoria, clave, calcular)
+
+        # El cálculo se hace fuera del bloqueo para no frenar a otras sesiones
+        try:
+            inicio = time.perf_counter()
+            valor = calcular()
+        except BaseException as error:
+            with self._bloqueo:
+                del self._en_curso[llave]
+            futuro.set_exception(error)
+            raise
+        entrada = {'valor': valor, 'categoria': categoria, 'tamaño': medir_tamaño(valor),
+                   'costo': time.perf_counter() - inicio, 'usos': 1}
+
+        with self._bloqueo:
+            entrada['prioridad'] = self._prioridad(entrada)
+            self._entradas[llave] = entrada
+            del self._en_curso[llave]
+            self._ajustar()
+        futuro.set_result(valor)
+        return valor
+
+    def fijar(self, categoria, clave, valor, tamaño=None):
+        # tamaño: para objetos cuya memoria no se puede medir desde Python
+        tamaño = medir_tamaño(valor) if tamaño is None else tamaño
+        with self._bloqueo:
+            self._fijas[(categoria, clave)] = {'categoria': categoria, 'tamaño': tamaño}
+        return valor
+
+    def _ajustar(self):
+        disponible = self.presupuesto - sum(e['tamaño'] for e in self._fijas.values())
+        total = sum(e['tamaño'] for e in self._entradas.values())
+        # La entrada recién agregada siempre se conserva (se está usando)
+        while total > disponible and len(self._entradas) > 1:
+            candidatas = list(self._entradas.items())[:-1]
+            llave, entrada = min(candidatas, key=lambda item: item[1]['prioridad'])
+            self._nivel = entrada['prioridad']
+            total -= entrada['tamaño']
+            del self._entradas[llave]
+            self.descartes += 1
+
+    def vaciar(self):
+        with self._bloqueo:
+            self._entradas.clear()
+            self._nivel = 0.0
+
+    def uso(self):
+        with self._bloqueo:
+            filas = [{'Categoría': e['categoria'], 'Tipo': 'Datos base', 'Tamaño': e['tamaño'], 'Usos': None}
+                     for e in self._fijas.values()]
+            filas += [{'Categoría': e['categoria'], 'Tipo': 'Caché', 'Tamaño': e['tamaño'], 'Usos': e['usos']}
+                      for e in self._entradas.values()]
+
+        if not filas:
+            return pd.DataFrame(columns=['Categoría', 'Tipo', 'Entradas', 'MB', 'Usos'])
+        uso = (pd.DataFrame(filas).groupby(['Tipo', 'Categoría'])
+                 .agg(Entradas=('Tamaño', 'size'), MB=('Tamaño', 'sum'), Usos=('Usos', 'sum'))
+                 .reset_index())
+        uso['MB'] = uso['MB'] / (1024 * 1024)
+        return uso.sort_values('MB', ascending=False)
+
+    def total(self):
+        with self._bloqueo:
+            return sum(e['tamaño'] for e in self._fijas.values()) + sum(e['tamaño'] for e in self._entradas.values())
@@ -0,0 +1,236 @@
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+from catalogo_datos import cargar_almacenes, filtrar_intervenciones, huella_fuentes, leer_catalogo
+from graficas import ESTILOS_CSS, construir_vista, tarjeta_metrica, vista_a_json
+
+# ============================================================================
+# REPORTES PRE-GENERADOS
+# ============================================================================
+# Las vistas más consultadas (global y por municipio, programa y año) se
+# calculan por lotes con el mismo código de gráficas del dashboard y se guardan
+# como instantáneas. El dashboard sirve la instantánea cuando los filtros
+# coinciden exactamente con una vista y ni los datos ni el código que calcula
+# las vistas han cambiado.
+#
+#   python reportes.py                          # genera HTML + JSON una vez
+#   python reportes.py --formatos html png pdf  # PNG/PDF requieren 'kaleido'
+#   python reportes.py --intervalo 60           # regenera cada 60 minutos
+DIRECTORIO_REPORTES = 'reportes'
+ARCHIVO_INDICE = 'indice.json'
+
+# Filtros con los que se genera una vista por cada valor
+FILTROS_ESTANDAR = [('Municipio', 'Municipio'), ('Programa', 'Programa'), ('Año_Ejecución', 'Año')]
+
+TITULOS_FIGURAS = {
+    'tema': "📚 Fase alcanzada por las empresas",
+    'genero': "👥 Distribución por Género",
+    'horas_tema': "⏱️ Distribución de Horas de Consultoría",
+    'municipio': "📍 Intervenciones por Municipio",
+    'sector': "🏢 Top 10 Sectores Atendidos",
+    'programa': "📋 Distribución por Programa",
+    'empresas_municipio': "📍 Empresas por Municipio",
+    'empresas_sector': "🏢 Empresas por Sector",
+    'top_empresas': "📊 Top 15 Empresas con Más Intervenciones",
+    'distribucion_empresas': "📈 Distribución de Intervenciones por Empresa",
+    'satisfaccion': "😊 Satisfacción del Cliente",
+    'ventas': "💰 Impacto en Ventas",
+    'procesos': "🔧 Procesos Tecnológicos",
+    'presencia': "🌐 Presencia Digital",
+    'evolucion_anual': "📊 Evolución por Año (Programas)",
+    'horas_promedio_tema': "🎯 Promedio de Horas por Tema",
+    'matriz_sector_genero': "💧 Matriz de Intervenciones: Sector x Género",
+    'talleres_tema': "📊 Participantes por Tema",
+    'talleres_mensual': "📅 Evolución Mensual de Participantes",
+}
+
+
+# Módulos que determinan el contenido de una instantánea (ingesta, validación,
+# filtros, gráficas y proyecciones): si cambian, las instantáneas se descartan
+ARCHIVOS_CODIGO = ['catalogo_datos.py', 'calidad_datos.py', 'graficas.py', 'series_tiempo.py']
+
+
+@lru_cache(maxsize=1)
+def version_codigo():
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    sha = hashlib.sha1()
+    for archivo in ARCHIVOS_CODIGO:
+        with open(os.path.join(directorio, archivo), 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def clave_filtros(filtros):
+    # Representación canónica: el orden de columnas y valores no importa
+    return json.dumps({c: sorted(str(v) for v in valores) for c, valores in filtros.items() if valores},
+                      ensure_ascii=False, sort_keys=True)
+
+
+def vistas_estandar(df):
+    vistas = [('Global', {})]
+    for columna, etiqueta in FILTROS_ESTANDAR:
+        for valor in sorted(df[columna].dropna().unique()):
+            valor = int(valor) if columna == 'Año_Ejecución' else valor
+            vistas.append((f"{etiqueta}: {valor}", {columna: [valor]}))
+    return vistas
+
+
+# ============================================================================
+# RENDERIZADO DE UNA VISTA (se ejecuta en los procesos del pool)
+# ============================================================================
+_datos_trabajador = {}
+
+
+def _iniciar_trabajador(almacenes):
+    _datos_trabajador['almacen'] = almacenes['intervenciones']
+    _datos_trabajador['talleres'] = almacenes['talleres'].unir() if 'talleres' in almacenes else None
+    _datos_trabajador['acumulados'] = {tipo: almacen.acumulado for tipo, almacen in almacenes.items()}
+
+
+def _html_vista(nombre, vista, generado):
+    metricas = vista['metricas']
+    tarjetas = ''.join([
+        tarjeta_metrica('metric-empresas', 'Intervenciones', f"{metricas['total_intervenciones']:,}"),
+        tarjeta_metrica('metric-unique', 'Empresas Únicas', f"{metricas['empresas_unicas']:,}"),
+        tarjeta_metrica('metric-municipio', 'Municipios', metricas['municipios_count']),
+        tarjeta_metrica('metric-sector', 'Corregimientos', metricas['corregimientos_count']),
+        tarjeta_metrica('metric-sector', 'Sectores', metricas['sectores_atendidos']),
+        tarjeta_metrica('metric-horas', 'Horas Consultoría', f"{metricas['total_horas']:,.0f}"),
+    ])
+    graficas = []
+    for clave, fig in vista['figuras'].items():
+        if fig is None:
+            continue
+        graficas.append(f"<div class='grafica'><h3>{TITULOS_FIGURAS.get(clave, clave)}</h3>"
+                        f"{fig.to_html(full_html=False, include_plotlyjs=False)}</div>")
+
+    return f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Dashboard Transformación Digital - {nombre}</title>
+<script src="https://cdn.plot.ly/plotly-2.27.0.min.js"></script>
+{ESTILOS_CSS}
+<style>
+    body {{ font-family: 'Poppins', sans-serif; margin: 20px; }}
+    .tarjetas {{ display: grid; grid-template-columns: repeat(6, 1fr); gap: 10px; }}
+    .graficas {{ display: grid; grid-template-columns: repeat(2, 1fr); gap: 20px; }}
+</style>
+</head>
+<body>
+<h1>🚀 Dashboard Transformación Digital - {nombre}</h1>
+<p style="color:#666;">Cámara de Comercio de Armenia y del Quindío • Generado: {generado}</p>
+<div class="tarjetas">{tarjetas}</div>
+<div class="graficas">{''.join(graficas)}</div>
+</body>
+</html>
+"""
+
+
+def _renderizar(tarea):
+    nombre, filtros, directorio, formatos, generado = tarea
+    df_filtrado = filtrar_intervenciones(_datos_trabajador['almacen'], filtros)
+    vista = construir_vista(df_filtrado, _datos_trabajador['talleres'], _datos_trabajador['acumulados'], filtros)
+
+    clave = clave_filtros(filtros)
+    base = hashlib.sha1(clave.encode('utf-8')).hexdigest()[:16]
+    registro = {'nombre': nombre, 'filtros': filtros, 'json': f"{base}.json"}
+
+    with open(os.path.join(directorio, registro['json']), 'w', encoding='utf-8') as f:
+        f.write(vista_a_json(vista))
+
+    if 'html' in formatos:
+        registro['html'] = f"{base}.html"
+        with open(os.path.join(directorio, registro['html']), 'w', encoding='utf-8') as f:
+            f.write(_html_vista(nombre, vista, generado))
+
+    # Imágenes estáticas: un archivo por gráfica
+    for formato in ('png', 'pdf'):
+        if formato in formatos:
+            os.makedirs(os.path.join(directorio, base), exist_ok=True)
+            for clave_fig, fig in vista['figuras'].items():
+                if fig is not None:
+                    fig.write_image(os.path.join(directorio, base, f"{clave_fig}.{formato}"))
+            registro[formato] = base
+
+    return clave, registro
+
+
+# ============================================================================
+# GENERACIÓN POR LOTES
+# ============================================================================
+def generar_reportes(directorio=DIRECTORIO_REPORTES, formatos=('html',), procesos=None):
+    formatos = set(formatos)
+    if formatos & {'png', 'pdf'} and importlib.util.find_spec('kaleido') is None:
+        print("⚠️ PNG/PDF requieren el paquete 'kaleido' (pip install kaleido); se omiten")
+        formatos -= {'png', 'pdf'}
+
+    fuentes = leer_catalogo()
+    huella = huella_fuentes(fuentes)
+    almacenes, _ = cargar_almacenes(fuentes)
+    almacen = almacenes['intervenciones']
+
+    os.makedirs(directorio, exist_ok=True)
+    generado = datetime.now().strftime('%Y-%m-%d %H:%M')
+    tareas = [(nombre, filtros, directorio, formatos, generado) for nombre, filtros in vistas_estandar(almacen.unir())]
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador, initargs=(almacenes,)) as pool:
+        vistas = dict(pool.map(_renderizar, tareas))
+
+    # El índice se escribe al final para que el dashboard nunca vea un lote a medias
+    indice = {'huella': huella, 'codigo': version_codigo(), 'generado': generado, 'vistas': vistas}
+    ruta_temporal = os.path.join(directorio, ARCHIVO_INDICE + '.tmp')
+    with open(ruta_temporal, 'w', encoding='utf-8') as f:
+        json.dump(indice, f, ensure_ascii=False, indent=1)
+    os.replace(ruta_temporal, os.path.join(directorio, ARCHIVO_INDICE))
+
+    return indice
+
+
+# ============================================================================
+# CONSULTA DESDE EL DASHBOARD
+# ============================================================================
+def leer_indice(directorio=DIRECTORIO_REPORTES):
+    ruta = os.path.join(directorio, ARCHIVO_INDICE)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding='utf-8') as f:
+        indice = json.load(f)
+    indice['directorio'] = directorio
+    return indice
+
+
+def buscar_instantanea(indice, filtros, huella):
+    # Ruta del JSON pre-generado para estos filtros, o None si no existe o si
+    # los datos o el código cambiaron después de generarlo
+    if not indice or indice['huella'] != huella or indice.get('codigo') != version_codigo():
+        return None
+    registro = indice['vistas'].get(clave_filtros(filtros))
+    if registro is None:
+        return None
+    ruta = os.path.join(indice['directorio'], registro['json'])
+    return ruta if os.path.exists(ruta) else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Genera los reportes pre-calculados del dashboard")
+    parser.add_argument('--salida', default=DIRECTORIO_REPORTES, help="Directorio de salida")
+    parser.add_argument('--formatos', nargs='+', default=['html'], choices=['html', 'png', 'pdf'])
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+    parser.add_argument('--intervalo', type=float, default=None, help="Minutos entre generaciones (sin valor: una sola vez)")
+    args = parser.parse_args()
+
+    while True:
+        inicio = time.time()
+        indice = generar_reportes(args.salida, args.formatos, args.procesos)
+        print(f"✅ {len(indice['vistas'])} vistas generadas en {time.time() - inicio:.1f} s ({args.salida})")
+        if args.intervalo is None:
+            break
+        time.sleep(args.intervalo * 60)
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# SERIES DE TIEMPO (acumulados por periodo)
+# ============================================================================
+# Cada archivo que se ingiere suma sus totales por periodo y dimensión a un
+# acumulado (mensual, trimestral o anual). Las gráficas de evolución leen de
+# ahí en lugar de agrupar las filas en cada ejecución, y las proyecciones se
+# calculan con una tendencia lineal por mínimos cuadrados.
+#
+# Intervenciones solo registran el año de ejecución, así que su acumulado es
+# anual; los talleres tienen fecha y se acumulan por mes, trimestre y año.
+FRECUENCIAS = {'Mensual': 'M', 'Trimestral': 'Q', 'Anual': 'Y'}
+
+FORMATO_PERIODO = {'M': '%Y-%m', 'Q': '%Y-T%q', 'Y': '%Y'}
+
+# Puntos recientes que se usan para ajustar la tendencia de cada frecuencia
+VENTANA_AJUSTE = {'M': 12, 'Q': 8, 'Y': 6}
+
+MINIMO_PUNTOS_PRONOSTICO = 3
+
+
+class AcumuladoTemporal:
+    def __init__(self, columna, frecuencias, dimensiones, medidas):
+        # columna: fecha (datetime) o año (numérico) que define el periodo
+        # medidas: nombre -> columna a sumar, o None para contar registros
+        self.columna = columna
+        self.frecuencias = frecuencias
+        self.dimensiones = dimensiones
+        self.medidas = medidas
+        self.tablas = {}
+
+    def _periodos(self, valores, frecuencia):
+        if pd.api.types.is_datetime64_any_dtype(valores):
+            return valores.dt.to_period(frecuencia)
+        # Solo el año: se representa como periodo anual
+        fechas = pd.to_datetime(pd.DataFrame({'year': valores, 'month': 1, 'day': 1}), errors='coerce')
+        return fechas.dt.to_period(frecuencia)
+
+    def agregar(self, df):
+        columnas = {nombre: (df[columna] if columna else pd.Series(1, index=df.index))
+                    for nombre, columna in self.medidas.items()}
+        for frecuencia in self.frecuencias:
+            parcial = pd.DataFrame({'Periodo': self._periodos(df[self.columna], frecuencia),
+                                    **{d: df[d] for d in self.dimensiones}, **columnas})
+            parcial = parcial.groupby(['Periodo'] + self.dimensiones, dropna=False).sum().reset_index()
+            # Los registros sin fecha no tienen periodo
+            parcial = parcial[parcial['Periodo'].notna()]
+            if frecuencia in self.tablas:
+                parcial = pd.concat([self.tablas[frecuencia], parcial])
+                parcial = parcial.groupby(['Periodo'] + self.dimensiones, dropna=False).sum().reset_index()
+            self.tablas[frecuencia] = parcial
+
+    def admite(self, filtros):
+        # Los filtros sobre columnas que no están en el acumulado requieren las filas
+        return all(columna in self.dimensiones or columna == self.columna for columna in filtros)
+
+    def serie(self, frecuencia, medida, filtros=None):
+        tabla = self.tablas[frecuencia]
+        mascara = np.ones(len(tabla), dtype=bool)
+        for columna, valores in (filtros or {}).items():
+            if columna == self.columna:
+                mascara &= tabla['Periodo'].dt.year.isin(valores).to_numpy()
+            else:
+                mascara &= tabla[columna].isin(valores).to_numpy()
+        return tabla[mascara].groupby('Periodo')[medida].sum().sort_index()
+
+
+# ============================================================================
+# PROYECCIÓN
+# ============================================================================
+def tendencia_lineal(valores, periodos):
+    # Ajuste por mínimos cuadrados de 'valores' y proyección de los siguientes 'periodos'
+    valores = np.asarray(valores, dtype=float)
+    n = len(valores)
+    t = np.arange(n, dtype=float)
+    t_media = t.mean()
+    media = valores.mean()
+    pendiente = ((t - t_media) * (valores - media)).sum() / ((t - t_media) ** 2).sum()
+    futuro = np.arange(n, n + periodos, dtype=float)
+    return np.clip(media + pendiente * (futuro - t_media), 0, None)
+
+
+def pronosticar(serie, frecuencia, periodos):
+    # serie: valores indexados por periodo (pueden faltar periodos sin datos).
+    # Devuelve la proyección indexada por periodo, o None si hay muy pocos datos.
+    if len(serie) == 0:
+        return None
+    completa = serie.reindex(pd.period_range(serie.index.min(), serie.index.max(), freq=frecuencia), fill_value=0)
+    completa = completa.iloc[-VENTANA_AJUSTE[frecuencia]:]
+    if len(completa) < MINIMO_PUNTOS_PRONOSTICO:
+        return None
+    # Las figuras que la usan ya quedan en el gestor de memoria del dashboard
+    proyeccion = tendencia_lineal(completa.to_numpy(dtype=float), periodos)
+    indice = pd.period_range(completa.index[-1] + 1, periods=periodos, freq=frecuencia)
+    return pd.Series(proyeccion, index=indice)
+
+
+def etiquetas_periodo(indice, frecuencia):
+    return indice.strftime(FORMATO_PERIODO[frecuencia])
@@ -0,0 +1,378 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from itertools import combinations
+
+import pandas as pd
+
+from catalogo_datos import cargar_almacenes, filtrar_intervenciones, leer_catalogo
+from graficas import construir_vista, vista_a_json
+from mapa_quindio import agregados_municipio, precalcular_cubo
+from reportes import clave_filtros, vistas_estandar
+
+# ============================================================================
+# VERIFICACIÓN DE MÉTRICAS (resultados esperados)
+# ============================================================================
+# Corre el cálculo del dashboard sin Streamlit sobre los libros incluidos y una
+# matriz de combinaciones de filtros. Cada vista se guarda como "resultado
+# esperado" (métricas, resúmenes y datos de cada gráfica) y se compara:
+#   - contra los resultados esperados guardados, para detectar cambios en los
+#     números de métricas y gráficas desde que se generaron
+#   - entre el motor de referencia y el motor actual, en igualdad y en tiempo.
+#     Ambos usan la misma ingesta validada y el mismo construir_vista(); solo
+#     difieren en cómo se filtra y agrega (máscaras sobre el DataFrame completo
+#     contra almacén particionado, cubo del mapa y acumulados por periodo), así
+#     que esta comparación solo verifica ese camino, no las fórmulas.
+#   - contra el cálculo original: métricas principales, intervenciones por
+#     empresa, resúmenes de indicadores y totales de talleres con las fórmulas
+#     y filtros del dashboard original sobre los libros sin validar. Las
+#     diferencias se listan para revisarlas pero no hacen fallar la
+#     verificación, porque la validación de calidad cambió algunos números a
+#     propósito (p. ej. los marcadores 'NAN' ahora son vacíos y los
+#     indicadores 0–1 se reescalan por programa, no por vista).
+#
+#   python verificar_metricas.py                # compara y mide
+#   python verificar_metricas.py --actualizar   # regenera los resultados esperados
+DIRECTORIO_ESPERADOS = 'resultados_esperados'
+ARCHIVO_INDICE = 'indice.json'
+
+COLUMNAS_FILTROS = ['Programa', 'Fase', 'Cohorte', 'Año_Ejecución', 'Municipio', 'Sector', 'Género']
+
+# Claves de cada traza que contienen datos (el resto es presentación)
+CLAVES_DATOS = ('type', 'name', 'x', 'y', 'z', 'labels', 'values', 'text', 'customdata', 'value')
+
+TOLERANCIA = 1e-9
+
+
+def matriz_filtros(df):
+    # Vistas estándar de los reportes + cada par de filtros con su valor más
+    # frecuente + todos los filtros a la vez + una vista sin resultados
+    vistas = vistas_estandar(df)
+    frecuentes = {c: df[c].value_counts().index[0] for c in COLUMNAS_FILTROS}
+    frecuentes['Año_Ejecución'] = int(frecuentes['Año_Ejecución'])
+    for a, b in combinations(COLUMNAS_FILTROS, 2):
+        vistas.append((f"{a}: {frecuentes[a]} + {b}: {frecuentes[b]}", {a: [frecuentes[a]], b: [frecuentes[b]]}))
+    vistas.append(('Todos los filtros', {c: [v] for c, v in frecuentes.items()}))
+    # Años no consecutivos: la evolución anual no debe proyectar sobre los años excluidos
+    años = sorted(int(a) for a in df['Año_Ejecución'].dropna().unique())
+    vistas.append((f"Año: {años[0]} + {años[-1]}", {'Año_Ejecución': [años[0], años[-1]]}))
+    vistas.append(('Sin resultados', {'Municipio': ['ARMENIA'], 'Año_Ejecución': [1900]}))
+    return vistas
+
+
+# ============================================================================
+# MOTORES
+# ============================================================================
+def _filtrar_referencia(df, filtros):
+    mascara = pd.Series(True, index=df.index)
+    for columna, valores in filtros.items():
+        mascara &= df[columna].isin(valores)
+    return df[mascara]
+
+
+def _agregados_referencia(df_filtrado):
+    return df_filtrado.groupby('Municipio').agg(
+        Intervenciones=('Municipio', 'size'),
+        Empresas=('empresa_id', 'nunique'),
+        Horas=('No_horas_de_consultoría', 'sum'),
+    )
+
+
+def _motor_referencia(datos, filtros):
+    df_filtrado = _filtrar_referencia(datos['df'], filtros)
+    return construir_vista(df_filtrado, datos['talleres'], filtros=filtros), _agregados_referencia(df_filtrado)
+
+
+def _motor_actual(datos, filtros):
+    df_filtrado = filtrar_intervenciones(datos['almacen'], filtros)
+    vista = construir_vista(df_filtrado, datos['talleres'], datos['acumulados'], filtros)
+    return vista, agregados_municipio(datos['cubo'], filtros)
+
+
+MOTORES = {
+    'referencia': _motor_referencia,
+    'actual': _motor_actual,
+}
+
+
+# ============================================================================
+# CÁLCULO ORIGINAL
+# ============================================================================
+ARCHIVO_ORIGINAL = 'transformacion_completamente_dividido.xlsx'
+ARCHIVO_TALLERES_ORIGINAL = 'Horas_talleres.xlsx'
+
+COLUMNAS_NUMERICAS_ORIGINAL = ['No_horas_de_consultoría', 'Indicador_satisfacción', 'Indicador_ventas',
+                               'Indicador_procesos_tecnologicos', 'Indicador_presencia_en_linea']
+
+
+def cargar_original(archivo=ARCHIVO_ORIGINAL):
+    # Lectura del dashboard original: sin validación de calidad
+    df = pd.read_excel(archivo)
+    for columna in COLUMNAS_NUMERICAS_ORIGINAL:
+        df[columna] = pd.to_numeric(df[columna], errors='coerce')
+    df['empresa_id'] = df['Nit'].fillna(df['Nombre_de_la_empresa']).fillna(df['Nombre'])
+    return df
+
+
+def cargar_talleres_original(archivo=ARCHIVO_TALLERES_ORIGINAL):
+    try:
+        return pd.read_excel(archivo)
+    except FileNotFoundError:
+        return None
+
+
+def _empresas_originales(df_filtrado):
+    intervenciones_por_empresa_id = df_filtrado.groupby('empresa_id').size()
+    total = len(intervenciones_por_empresa_id)
+    resumen = {
+        'total_empresas_con_interv': total,
+        'promedio_interv': float(intervenciones_por_empresa_id.mean()),
+        'mediana_interv': float(intervenciones_por_empresa_id.median()),
+        'max_interv': int(intervenciones_por_empresa_id.max()),
+        'empresas_1_interv': int((intervenciones_por_empresa_id == 1).sum()),
+        'empresas_recurrentes': int((intervenciones_por_empresa_id >= 5).sum()),
+        'empresas_10_mas': int((intervenciones_por_empresa_id >= 10).sum()),
+    }
+    resumen['pct_1_interv'] = resumen['empresas_1_interv'] / total * 100
+    resumen['pct_recurrentes'] = resumen['empresas_recurrentes'] / total * 100
+    resumen['pct_10_mas'] = resumen['empresas_10_mas'] / total * 100
+
+    bins = [1, 2, 5, 10, 20, 50, float('inf')]
+    labels = ['1 intervención', '2-4 intervenciones', '5-9 intervenciones', '10-19 intervenciones', '20-49 intervenciones', '50+ intervenciones']
+    rangos = pd.cut(intervenciones_por_empresa_id, bins=bins, labels=labels, right=False)
+    resumen['distribucion'] = {str(k): int(v) for k, v in rangos.value_counts().sort_index().items()}
+    return resumen
+
+
+def _indicadores_originales(df_filtrado):
+    resumen = {}
+    sat_data = df_filtrado['Indicador_satisfacción'].dropna()
+    if len(sat_data) > 0:
+        resumen['satisfaccion'] = {'promedio': float(sat_data.mean()), 'emp': len(sat_data),
+                                   'pct_sat': float((sat_data >= 75).sum() / len(sat_data) * 100)}
+
+    vent_data = df_filtrado['Indicador_ventas'].dropna()
+    if len(vent_data) > 0:
+        mej = int((vent_data > 0).sum())
+        resumen['ventas'] = {
+            'medidas': len(vent_data),
+            'mej': mej,
+            'sin_c': int((vent_data == 0).sum()),
+            'pct_mej': float(vent_data[vent_data > 0].mean() * 100) if mej > 0 else 0,
+        }
+
+    for clave, columna in [('procesos', 'Indicador_procesos_tecnologicos'),
+                           ('presencia', 'Indicador_presencia_en_linea')]:
+        datos = df_filtrado[columna].dropna()
+        if len(datos) > 0:
+            # El original reescalaba en cada vista filtrada, según el máximo de esa vista
+            if datos.max() <= 1:
+                datos = datos * 100
+            resumen[clave] = {'promedio': float(datos.mean()), 'emp': len(datos)}
+    return resumen
+
+
+def talleres_originales(df_talleres):
+    return {
+        'total_talleres_realizados': len(df_talleres),
+        'total_horas_talleres': float(df_talleres['Horas'].sum()),
+        'total_participantes_talleres': float(df_talleres['Participantes'].sum()),
+        'promedio_participantes_taller': float(df_talleres['Participantes'].mean()),
+    }
+
+
+def metricas_originales(df, filtros):
+    mascara = pd.Series(True, index=df.index)
+    for columna, valores in filtros.items():
+        seleccion = df[columna].isin(valores)
+        if columna in ('Fase', 'Cohorte'):
+            # El original conservaba las filas sin Fase ni Cohorte
+            seleccion |= df[columna].isna()
+        mascara &= seleccion
+    df_filtrado = df[mascara]
+    sectores = df_filtrado.loc[df_filtrado['Sector'].notna() & (df_filtrado['Sector'] != 'NAN'), 'Sector']
+    metricas = {
+        'total_intervenciones': len(df_filtrado),
+        'empresas_unicas': df_filtrado['empresa_id'].nunique(),
+        'municipios_count': df_filtrado.loc[df_filtrado['Municipio'] != 'BARCELONA', 'Municipio'].nunique(),
+        'corregimientos_count': 1 if 'BARCELONA' in df_filtrado['Municipio'].values else 0,
+        'sectores_atendidos': sectores.nunique(),
+        'total_horas': float(df_filtrado['No_horas_de_consultoría'].sum()),
+    }
+    if len(df_filtrado) == 0:
+        return {'metricas': metricas}
+    return {'metricas': metricas, 'empresas': _empresas_originales(df_filtrado),
+            'indicadores': _indicadores_originales(df_filtrado)}
+
+
+def comparables_actuales(resultado):
+    # Mismos grupos y claves que metricas_originales(), tomados de la vista actual
+    comparables = {'metricas': resultado['metricas']}
+    if 'empresas' not in resultado:
+        return comparables
+    figuras = resultado['figuras']
+    empresas = dict(resultado['empresas'])
+    distribucion = figuras['distribucion_empresas'][0]
+    empresas['distribucion'] = dict(zip(distribucion['x'], distribucion['y']))
+    comparables['empresas'] = empresas
+
+    indicadores = {clave: dict(valores) for clave, valores in resultado['indicadores'].items()}
+    for clave in ('satisfaccion', 'procesos', 'presencia'):
+        if clave in indicadores:
+            # El promedio solo se guarda como valor del indicador de la gráfica
+            indicadores[clave]['promedio'] = figuras[clave][0]['value']
+    comparables['indicadores'] = indicadores
+    return comparables
+
+
+# ============================================================================
+# RESULTADO DE UNA VISTA
+# ============================================================================
+def _resultado(vista, agregados):
+    datos = json.loads(vista_a_json(vista))
+    figuras = {}
+    for clave, fig in datos.pop('figuras').items():
+        figuras[clave] = None if fig is None else [{k: v for k, v in traza.items() if k in CLAVES_DATOS} for traza in fig['data']]
+    datos['figuras'] = figuras
+    datos['mapa'] = json.loads(agregados.sort_index().to_json(orient='index', force_ascii=False))
+    return datos
+
+
+def diferencias(esperado, obtenido, ruta=''):
+    if isinstance(esperado, dict) and isinstance(obtenido, dict):
+        salida = []
+        for clave in sorted(set(esperado) | set(obtenido), key=str):
+            if clave not in obtenido:
+                salida.append(f"{ruta}.{clave}: falta")
+            elif clave not in esperado:
+                salida.append(f"{ruta}.{clave}: sobra")
+            else:
+                salida.extend(diferencias(esperado[clave], obtenido[clave], f"{ruta}.{clave}"))
+        return salida
+    if isinstance(esperado, list) and isinstance(obtenido, list):
+        if len(esperado) != len(obtenido):
+            return [f"{ruta}: {len(esperado)} elementos, se obtuvieron {len(obtenido)}"]
+        salida = []
+        for i, (a, b) in enumerate(zip(esperado, obtenido)):
+            salida.extend(diferencias(a, b, f"{ruta}[{i}]"))
+        return salida
+    numericos = (int, float)
+    if isinstance(esperado, numericos) and isinstance(obtenido, numericos) and not isinstance(esperado, bool):
+        if abs(esperado - obtenido) > TOLERANCIA * max(1, abs(esperado)):
+            return [f"{ruta}: {esperado!r} → {obtenido!r}"]
+        return []
+    if esperado != obtenido:
+        return [f"{ruta}: {str(esperado)[:60]!r} → {str(obtenido)[:60]!r}"]
+    return []
+
+
+# ============================================================================
+# EJECUCIÓN
+# ============================================================================
+def cargar_datos_verificacion():
+    almacenes, _ = cargar_almacenes(leer_catalogo())
+    almacen = almacenes['intervenciones']
+    df = almacen.unir()
+    return {
+        'almacen': almacen,
+        'df': df,
+        'cubo': precalcular_cubo(df),
+        'talleres': almacenes['talleres'].unir() if 'talleres' in almacenes else None,
+        'acumulados': {tipo: a.acumulado for tipo, a in almacenes.items()},
+        'original': cargar_original(),
+        'talleres_original': cargar_talleres_original(),
+    }
+
+
+def _archivo(filtros):
+    return hashlib.sha1(clave_filtros(filtros).encode('utf-8')).hexdigest()[:16] + '.json'
+
+
+def verificar(directorio=DIRECTORIO_ESPERADOS, actualizar=False, repeticiones=1):
+    datos = cargar_datos_verificacion()
+    vistas = matriz_filtros(datos['df'])
+    tiempos = {motor: 0.0 for motor in MOTORES}
+    problemas = []
+    cambios_original = []
+
+    if actualizar:
+        os.makedirs(directorio, exist_ok=True)
+        indice = {}
+
+    for nombre, filtros in vistas:
+        resultados = {}
+        for motor, calcular in MOTORES.items():
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                vista, agregados = calcular(datos, filtros)
+            tiempos[motor] += (time.perf_counter() - inicio) / repeticiones
+            resultados[motor] = _resultado(vista, agregados)
+
+        for motor in MOTORES:
+            if motor != 'referencia':
+                problemas.extend(f"[{nombre}] referencia vs {motor}{d}"
+                                 for d in diferencias(resultados['referencia'], resultados[motor]))
+
+        cambios_original.extend(f"[{nombre}] {d.lstrip('.')}"
+                                for d in diferencias(metricas_originales(datos['original'], filtros),
+                                                     comparables_actuales(resultados['actual'])))
+        # Los talleres no dependen de los filtros: se comparan una sola vez
+        if 'talleres' in resultados['actual'] and datos['talleres_original'] is not None:
+            talleres = resultados['actual']['talleres']
+            cambios_original.extend(f"[Talleres] {d.lstrip('.')}"
+                                    for d in diferencias(talleres_originales(datos['talleres_original']),
+                                                         {k: talleres[k] for k in talleres if k != 'taller_max'}))
+            datos['talleres_original'] = None
+
+        ruta = os.path.join(directorio, _archivo(filtros))
+        if actualizar:
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump(resultados['actual'], f, ensure_ascii=False, indent=1)
+            indice[clave_filtros(filtros)] = {'nombre': nombre, 'archivo': _archivo(filtros)}
+        elif not os.path.exists(ruta):
+            problemas.append(f"[{nombre}] no hay resultado esperado ({ruta}); use --actualizar")
+        else:
+            with open(ruta, encoding='utf-8') as f:
+                esperado = json.load(f)
+            problemas.extend(f"[{nombre}] esperado vs actual{d}" for d in diferencias(esperado, resultados['actual']))
+
+    if actualizar:
+        with open(os.path.join(directorio, ARCHIVO_INDICE), 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False, indent=1)
+
+    return len(vistas), tiempos, problemas, cambios_original
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Verifica que las métricas y gráficas del dashboard no cambien")
+    parser.add_argument('--directorio', default=DIRECTORIO_ESPERADOS, help="Directorio de resultados esperados")
+    parser.add_argument('--actualizar', action='store_true', help="Regenera los resultados esperados con el motor actual")
+    parser.add_argument('--repeticiones', type=int, default=1, help="Repeticiones por vista para medir tiempos")
+    args = parser.parse_args()
+
+    total, tiempos, problemas, cambios_original = verificar(args.directorio, args.actualizar, args.repeticiones)
+
+    print(f"Vistas verificadas: {total}")
+    for motor, segundos in tiempos.items():
+        print(f"  {motor:<12} {segundos:7.2f} s  ({segundos / total * 1000:6.1f} ms por vista)")
+    if tiempos['actual'] > 0:
+        print(f"  Aceleración: {tiempos['referencia'] / tiempos['actual']:.2f}x")
+
+    if cambios_original:
+        print(f"\nℹ️ {len(cambios_original)} métricas distintas del cálculo original (revise que sean intencionales):")
+        for cambio in cambios_original[:20]:
+            print(f"  {cambio}")
+        if len(cambios_original) > 20:
+            print(f"  ... y {len(cambios_original) - 20} más")
+
+    if problemas:
+        print(f"\n❌ {len(problemas)} diferencias:")
+        for problema in problemas[:50]:
+            print(f"  {problema}")
+        if len(problemas) > 50:
+            print(f"  ... y {len(problemas) - 50} más")
+        sys.exit(1)
+    print("\n✅ " + ("Resultados esperados actualizados" if args.actualizar else "Sin diferencias"))